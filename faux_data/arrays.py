@@ -0,0 +1,335 @@
+#    Copyright 2022 @jack-tee
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Pandas columns held as Arrow arrays, for types pandas has no native equivalent of, e.g. fixed precision decimals.
+
+Holding these as Arrow arrays avoids building a python object per row and the Parquet and BigQuery targets write the
+Arrow array as it is.
+"""
+
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.extensions import ExtensionArray, ExtensionDtype
+from pandas.api.indexers import check_array_indexer
+
+# the most digits a decimal128 can hold
+MAX_DECIMAL_PRECISION = 38
+
+# arrow string arrays use 32 bit offsets so their data can't exceed this many bytes
+MAX_STRING_ARRAY_BYTES = 2**31 - 1
+
+
+def is_list_type(pyarrow_dtype: pa.DataType) -> bool:
+    return pa.types.is_list(pyarrow_dtype) or pa.types.is_large_list(pyarrow_dtype)
+
+
+class ArrowDtype(ExtensionDtype):
+    """The pandas dtype of a column held as an Arrow array of `pyarrow_dtype`."""
+
+    _metadata = ("pyarrow_dtype",)
+    na_value = pd.NA
+
+    def __init__(self, pyarrow_dtype: pa.DataType):
+        self.pyarrow_dtype = pyarrow_dtype
+
+    @property
+    def name(self) -> str:
+        return str(self.pyarrow_dtype)
+
+    @property
+    def type(self) -> type:
+        if pa.types.is_decimal(self.pyarrow_dtype):
+            return Decimal
+        if pa.types.is_struct(self.pyarrow_dtype):
+            return dict
+        if is_list_type(self.pyarrow_dtype):
+            return np.ndarray
+        return object
+
+    @classmethod
+    def construct_array_type(cls):
+        return ArrowArray
+
+    @classmethod
+    def construct_from_string(cls, string: str):
+        raise TypeError(f"Cannot construct a 'ArrowDtype' from '{string}'")
+
+    def __from_arrow__(self, array: pa.Array | pa.ChunkedArray) -> "ArrowArray":
+        return ArrowArray(array)
+
+
+class ArrowArray(ExtensionArray):
+    """A pandas array backed by an Arrow (chunked) array.
+
+    Arrow arrays are immutable so operations that change values build a new array rather than setting items.
+    """
+
+    def __init__(self, values: pa.Array | pa.ChunkedArray):
+        if isinstance(values, pa.Array):
+            values = pa.chunked_array([values], type=values.type)
+        self._data = values
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        pyarrow_dtype = dtype.pyarrow_dtype if isinstance(dtype, ArrowDtype) else None
+        return cls(pa.array([None if pd.isnull(v) else v for v in scalars], type=pyarrow_dtype))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values, dtype=original.dtype)
+
+    @property
+    def dtype(self) -> ArrowDtype:
+        return ArrowDtype(self._data.type)
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._to_scalar(self._data[int(item)])
+
+        if isinstance(item, slice):
+            return type(self)(self._data[item])
+
+        item = check_array_indexer(self, item)
+        if item.dtype == bool:
+            return type(self)(self._data.filter(pa.array(item)))
+        return self.take(item)
+
+    def __iter__(self):
+        if is_list_type(self._data.type):
+            for chunk in self._data.chunks:
+                yield from (self._to_scalar(value) for value in chunk)
+        else:
+            for value in self._data.to_pylist():
+                yield pd.NA if value is None else value
+
+    def __array__(self, dtype=None):
+        # filled one by one as numpy would turn a list of equal length arrays into a 2d array
+        values = np.empty(len(self), dtype=object)
+        for i, value in enumerate(self):
+            values[i] = value
+        return values if dtype is None else values.astype(dtype)
+
+    def astype(self, dtype, copy=True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, np.dtype) and dtype.kind in "US":
+            # numpy can't cast arrays held within an object array to strings itself
+            return np.array([str(value) for value in self], dtype=dtype)
+        return super().astype(dtype, copy=copy)
+
+    @staticmethod
+    def _to_scalar(value: pa.Scalar):
+        if not value.is_valid:
+            return pd.NA
+        if isinstance(value, pa.ListScalar):
+            # lists are numpy arrays, as they were when Array columns were built row by row
+            if value.values.null_count and not pa.types.is_floating(value.values.type):
+                # numpy would turn nulls into NaNs and ints into floats so these are held as objects instead
+                return np.array([pd.NA if item is None else item for item in value.values.to_pylist()], dtype=object)
+            return value.values.to_numpy(zero_copy_only=False)
+        return value.as_py()
+
+    def __arrow_array__(self, type=None):
+        return self._data if type is None else self._data.cast(type)
+
+    def __eq__(self, other):
+        return np.asarray(self, dtype=object) == other
+
+    def to_pylist(self) -> list:
+        """Returns the values as python objects, with lists as python lists and nulls as None."""
+        return self._data.to_pylist()
+
+    def isna(self) -> np.ndarray:
+        return self._data.is_null().to_numpy(zero_copy_only=False)
+
+    def take(self, indices, allow_fill=False, fill_value=None) -> "ArrowArray":
+        indices = np.asarray(indices, dtype=np.int64)
+        if allow_fill:
+            if fill_value is not None and not pd.isnull(fill_value):
+                raise NotImplementedError("ArrowArray can only be filled with nulls")
+            # -1 means a null row
+            return type(self)(self._data.take(pa.array(indices, mask=indices < 0)))
+
+        return type(self)(self._data.take(pa.array(np.where(indices < 0, indices + len(self), indices))))
+
+    def copy(self) -> "ArrowArray":
+        return type(self)(self._data)
+
+    def with_nulls(self, mask: np.ndarray) -> "ArrowArray":
+        """Returns a copy of the array with the rows where `mask` is True set to null."""
+        return type(self)(pc.if_else(pa.array(mask), pa.scalar(None, type=self._data.type), self._data))
+
+    def _values_for_factorize(self):
+        return np.asarray(self, dtype=object), pd.NA
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+        return cls(pa.chunked_array([chunk for array in to_concat for chunk in array._data.chunks],
+                                    type=to_concat[0]._data.type))
+
+
+def to_arrow(series: pd.Series) -> pa.Array:
+    """Returns the values of `series` as a single Arrow array, without copying them where the layouts match."""
+    array = pa.array(series, from_pandas=True)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    return array
+
+
+def to_arrow_table(df: pd.DataFrame, schema: pa.Schema = None) -> pa.Table:
+    """Converts `df` to an Arrow table, e.g. to write to Parquet, that pandas can read back.
+
+    pyarrow records each column's pandas dtype in the table's metadata and pandas can't rebuild an `ArrowDtype` from
+    its name when reading the table back, so those columns are recorded as object columns, as they were before they
+    were held as Arrow arrays. pandas then reads them back as python values, e.g. dicts, numpy arrays and Decimals.
+    """
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    arrow_columns = {str(name) for name in df.columns if isinstance(df[name].dtype, ArrowDtype)}
+    if not arrow_columns or not table.schema.metadata or b"pandas" not in table.schema.metadata:
+        return table
+
+    pandas_metadata = json.loads(table.schema.metadata[b"pandas"])
+    for column in pandas_metadata["columns"]:
+        if column["name"] in arrow_columns:
+            column["numpy_type"] = "object"
+    return table.replace_schema_metadata({**table.schema.metadata, b"pandas": json.dumps(pandas_metadata).encode()})
+
+
+def to_struct(df: pd.DataFrame, names: list) -> pd.Series:
+    """Combines the `names` columns of `df` into a column of structs, one field per column.
+
+    The struct's children are the columns' own Arrow arrays so no per row dicts are built and the struct's type comes
+    straight from the columns' types.
+    """
+    struct = pa.StructArray.from_arrays([to_arrow(df[name]) for name in names], names=names)
+    return pd.Series(ArrowArray(struct), index=df.index)
+
+
+def to_list(df: pd.DataFrame, names: list, drop_nulls: bool = False) -> pd.Series | None:
+    """Combines the `names` columns of `df` into a column of lists, one item per column, dropping nulls if `drop_nulls`.
+
+    The columns' Arrow arrays are interleaved into the list's values with a single take and the offsets of each row's
+    list are computed from the null counts, so no per row arrays are built. Returns None if the columns' types can't
+    be held in a single list type.
+    """
+    children = [to_arrow(df[name]) for name in names]
+    children = [child.dictionary_decode() if pa.types.is_dictionary(child.type) else child for child in children]
+
+    value_type = common_type([child.type for child in children])
+    if value_type is None:
+        return None
+
+    rows, width = len(df), len(children)
+    values = pa.concat_arrays([child.cast(value_type) for child in children])
+    # row major positions of each item within the column major concatenated values
+    positions = (np.arange(width, dtype=np.int64) * rows + np.arange(rows, dtype=np.int64)[:, None]).ravel()
+
+    if drop_nulls:
+        valid = np.column_stack([~child.is_null().to_numpy(zero_copy_only=False) for child in children])
+        positions = positions[valid.ravel()]
+        lengths = valid.sum(axis=1)
+    else:
+        lengths = np.full(rows, width)
+
+    # list arrays have 32 bit offsets so very large columns need a large list
+    large = len(positions) >= 2**31
+    offsets = np.zeros(rows + 1, dtype=np.int64 if large else np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+
+    list_class = pa.LargeListArray if large else pa.ListArray
+    lists = list_class.from_arrays(pa.array(offsets), values.take(pa.array(positions)))
+    return pd.Series(ArrowArray(lists), index=df.index)
+
+
+def common_type(types: list) -> pa.DataType | None:
+    """Returns the type that can hold values of all the `types` without loss, if there is one."""
+    types = set(types)
+    if len(types) == 1:
+        return types.pop()
+    if all(pa.types.is_integer(t) for t in types):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    if all(pa.types.is_string(t) or pa.types.is_large_string(t) for t in types):
+        return pa.large_string()
+    return None
+
+
+def to_decimal(series: pd.Series, scale: int, precision: int = MAX_DECIMAL_PRECISION) -> pd.Series:
+    """Converts a numeric, or numeric text, `series` into a column of fixed precision decimals with `scale` decimal places.
+
+    Ints, and floats small enough that they're exact once scaled, are rounded and scaled into int64s and those ints are
+    written straight into a decimal128 array, rather than creating a python Decimal for every row. Anything else, e.g.
+    the text of a csv column or very large floats, is parsed as decimal text by Arrow so no digits are lost.
+    """
+    if not 0 <= scale <= precision <= MAX_DECIMAL_PRECISION:
+        raise Exception(f"Decimal precision [{precision}] and scale [{scale}] must satisfy 0 <= scale <= precision <= {MAX_DECIMAL_PRECISION}")
+
+    nulls = series.isnull().to_numpy()
+    scaled = None
+    if pd.api.types.is_integer_dtype(series.dtype):
+        ints = series.to_numpy(dtype=np.int64, na_value=0)
+        if int(np.abs(ints).max(initial=0)) < 2 ** 63 // 10 ** scale:
+            scaled = ints * 10 ** scale
+    elif pd.api.types.is_float_dtype(series.dtype):
+        values = np.round(series.to_numpy(dtype=np.float64, na_value=np.nan), scale) * 10 ** scale
+        # float64 holds every int up to 2**53 exactly, past that the scaled values aren't exact
+        if np.abs(np.where(nulls, 0, values)).max(initial=0) < 2 ** 53:
+            scaled = np.where(nulls, 0, np.round(values)).astype(np.int64)
+
+    if scaled is None:
+        decimals = decimal_from_text(pa.array(series.astype("string"), from_pandas=True), scale, precision)
+        return pd.Series(ArrowArray(decimals), index=series.index, name=series.name)
+
+    if int(np.abs(scaled).max(initial=0)) >= 10 ** precision:
+        raise Exception(f"Decimal values have more than the [{precision}] digits of precision allowed")
+
+    # decimal128s are 16 byte two's complement ints, the low 8 bytes are the scaled int and the high 8 its sign
+    words = np.empty((len(scaled), 2), dtype=np.int64)
+    words[:, 0] = scaled
+    words[:, 1] = scaled >> 63
+
+    decimals = pa.Array.from_buffers(pa.decimal128(precision, scale), len(scaled), [None, pa.py_buffer(words)])
+    array = ArrowArray(decimals)
+    if nulls.any():
+        array = array.with_nulls(nulls)
+
+    return pd.Series(array, index=series.index, name=series.name)
+
+
+def decimal_from_text(text: pa.Array, scale: int, precision: int) -> pa.Array:
+    """Parses decimal text, e.g. `12345678901234.5` or `1.5e-05`, into decimals rounded to `scale` decimal places.
+
+    The text is parsed into decimal256s with 38 digits either side of the point so that it's rounded, rather than
+    truncated, to `scale`.
+    """
+    parsed = pc.cast(pc.utf8_trim_whitespace(text), pa.decimal256(2 * MAX_DECIMAL_PRECISION, MAX_DECIMAL_PRECISION),
+                     safe=False)
+    rounded = pc.round(parsed, ndigits=scale, round_mode="half_to_even")
+    try:
+        return rounded.cast(pa.decimal128(precision, scale))
+    except pa.ArrowInvalid:
+        raise Exception(f"Decimal values have more than the [{precision}] digits of precision allowed")
@@ -20,7 +20,6 @@ from typing import List
 
 from jinja2 import Environment, FileSystemLoader
 
-from .config import log_config
 from .template import Template
 from .utils import get_parts
 from .version import __version__
@@ -84,16 +83,19 @@ def cmd(args: List[str]):
             print(__version__)
 
         case ['config'] | ['--config']:
+            # importing the config loads dynaconf, which the other commands only need once they generate data
+            from .config import log_config
             print('\n'.join(c for c in log_config()))
 
         case [cmd, filename, *objs]:
             params = parse_params(objs)
             set_debug(params)
+            workers = get_workers(params)
 
             match cmd:
                 case 'run':
                     t = Template.from_file(filename, params)
-                    t.run()
+                    t.run(workers)
                     cmd_template = env.get_template("run.jinja")
                     print(cmd_template.render(template=t))
 
@@ -104,7 +106,7 @@ def cmd(args: List[str]):
 
                 case 'sample':
                     t = Template.from_file(filename, params)
-                    t.generate()
+                    t.generate(workers)
                     cmd_template = env.get_template("sample.jinja")
                     print(cmd_template.render(template=t, filename=filename))
 
@@ -115,7 +117,7 @@ def cmd(args: List[str]):
                                 filepath = os.path.join(root, filename)
                                 try:
                                     t = Template.from_file(filepath, params)
-                                    t.generate()
+                                    t.generate(workers)
                                     print(filepath, "OK")
                                 except Exception as e:
                                     print(filepath, e)
@@ -139,6 +141,17 @@ def set_debug(params: dict) -> None:
         logging.basicConfig(level="INFO")
 
 
+def get_workers(params: dict) -> int | None:
+    """Removes the `--workers` flag from the params, returning the number of worker processes to generate with."""
+    workers = params.pop("workers", None)
+    if workers is None:
+        return None
+    if workers is True:
+        # --workers on its own uses every core
+        return os.cpu_count()
+    return int(workers)
+
+
 def main():
     cmd(sys.argv)
 
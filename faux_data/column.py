@@ -13,17 +13,25 @@
 #    limitations under the License.
 
 import abc
-import json
+import ast
+import keyword
 import logging
-import random
 import string
 from dataclasses import dataclass, field
-from decimal import Decimal
-from itertools import chain, zip_longest
+from itertools import zip_longest
 from typing import List, Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.extensions import take
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+from .arrays import MAX_STRING_ARRAY_BYTES, ArrowArray, ArrowDtype, to_decimal, to_list, to_struct
+from .datetimes import factorize_timestamps, format_resolution, format_timestamps
+from .encoding import to_json_arrays, to_json_lines, to_string_series
 
 pandas_type_mapping = {
     "Int": "Int64",
@@ -46,8 +54,23 @@ class Column(abc.ABC):
     data_type: str = None
     output_type: Optional[str] = None
     null_percentage: int = 0
+    null_mode: str = "exact"
     decimal_places: int = 4
     date_format: str = "%Y-%m-%d %H:%M:%S"
+    _rng = None
+    # whether the column is a single value created by `constant`, these stay dictionary encoded whatever their type
+    _constant = False
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """The column's random number generator, unless the column has been seeded this draws from fresh entropy."""
+        if self._rng is None:
+            self._rng = np.random.default_rng()
+        return self._rng
+
+    def seed(self, seed_sequence: np.random.SeedSequence) -> None:
+        """Gives the column its own random number generator derived from `seed_sequence`."""
+        self._rng = np.random.default_rng(seed_sequence)
 
     def maybe_add_column(self, df: pd.DataFrame) -> None:
         try:
@@ -57,44 +80,117 @@ class Column(abc.ABC):
             raise ColumnGenerationException(
                 f"Error on column [{self.name}]. Caused by: {e}.")
 
+    def generate_column(self, rows: int) -> pd.Series:
+        """Generates and post processes the column without adding it to a frame, for columns that only `generate`."""
+        try:
+            return self.process(self.generate(rows))
+        except Exception as e:
+            raise ColumnGenerationException(
+                f"Error on column [{self.name}]. Caused by: {e}.")
+
     def add_column(self, df: pd.DataFrame) -> None:
         df[self.name] = self.generate(len(df))
 
     def post_process(self, df: pd.DataFrame) -> None:
-        
+        df[self.name] = self.process(df[self.name])
+
+    def process(self, series: pd.Series) -> pd.Series:
+        """Adds nulls to the column's values and converts them to its `data_type:` and `output_type:`."""
         if self.null_percentage > 0:
-            nanidx = df.sample(frac=self.null_percentage / 100).index
-            df.loc[nanidx,self.name] = np.nan 
+            series = with_nulls(series, self.null_mask(len(series)))
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return self.convert_categories(series)
+        return self.convert(series)
+
+    def inputs(self) -> List[str] | None:
+        """The names of the columns this column reads, or None if they can't be known before generating."""
+        return []
+
+    def outputs(self) -> List[str]:
+        """The names of the columns this column adds or changes."""
+        return [self.name]
+
+    def drops(self) -> List[str]:
+        """The names of the columns this column removes."""
+        return []
+
+    def is_independent(self) -> bool:
+        """Whether the column is generated from the number of rows alone, so it can be generated alongside others."""
+        return type(self).add_column is Column.add_column and not self.inputs()
+
+    def null_mask(self, rows: int) -> np.ndarray:
+        """Draws a boolean mask of the rows to set to null.
+
+        With the default `null_mode: exact` exactly `null_percentage:` of the rows are null, with `null_mode: bernoulli`
+        each row is independently null with a probability of `null_percentage:`.
+        """
+        match self.null_mode:
+            case 'exact':
+                nulls = min(round(rows * self.null_percentage / 100), rows)
+                mask = np.zeros(rows, dtype=bool)
+                if nulls == rows:
+                    mask[:] = True
+                elif nulls:
+                    # the rows with the smallest random keys are null, a partial sort is linear in the rows where
+                    # `choice` without replacement shuffles all of them
+                    mask[np.argpartition(self.rng.random(rows), nulls)[:nulls]] = True
+                return mask
+            case 'bernoulli':
+                return self.rng.random(rows) < self.null_percentage / 100
+            case _:
+                raise Exception(f"null_mode: [{self.null_mode}] not recognised, should be one of exact, bernoulli")
 
+    def convert(self, series: pd.Series) -> pd.Series:
+        """Converts `series` to the column's `data_type:` and then `output_type:`."""
         match self.data_type:
             case None:
                 pass
             case 'Decimal':
-                df[self.name] = df[self.name][df[self.name].notnull()] \
-                                    .round(decimals=self.decimal_places) \
-                                    .astype("string") \
-                                    .apply(lambda v: Decimal(v)) \
-                                    .astype("object")
+                series = to_decimal(series, self.decimal_places)
             case _:
                 pandas_type = self.pandas_type()
                 if pandas_type is None:
                     logging.warning(f"column: [{self.name}] -> data_type [{self.data_type}] not recognised, ignoring.")
+                elif pandas_type == 'string' and isinstance(series.dtype, pd.StringDtype):
+                    # already strings, casting would turn Arrow backed strings into python objects
+                    pass
+                elif pandas_type == 'bool' and (series.hasnans or self.null_percentage or series.dtype == 'boolean'):
+                    # a column that can be null is always a nullable boolean, not only in the chunks that have nulls
+                    series = series.astype('boolean')
                 else:
-                    df[self.name] = df[self.name].astype(self.pandas_type())
+                    series = series.astype(self.pandas_type())
 
         match self.output_type:
             case None:
                 pass
             case 'String':
-                if df[self.name].dtype == 'datetime64[ns]':
-                    df[self.name] = df[self.name].dt.strftime(self.date_format).astype('string')
+                if series.dtype == 'datetime64[ns]':
+                    series = format_timestamps(series, self.date_format)
                 else:
-                    df[self.name] = df[self.name].astype(pandas_type_mapping[self.output_type])
+                    series = series.astype(pandas_type_mapping[self.output_type])
             case 'Timestamp' | 'Datetime':
-                df[self.name] = df[self.name].astype(pandas_type_mapping[self.output_type])
+                series = series.astype(pandas_type_mapping[self.output_type])
             case _:
                 raise Exception(f"output_type: [{self.output_type}] not recognised")
 
+        return series
+
+    def convert_categories(self, series: pd.Series) -> pd.Series:
+        """Converts a dictionary encoded column by converting its few distinct values rather than every row."""
+        categories = self.convert(pd.Series(series.cat.categories))
+        if categories.is_unique and categories.notnull().all():
+            if is_dictionary_type(categories.dtype) and len(categories):
+                return pd.Series(pd.Categorical.from_codes(series.cat.codes, categories=categories.astype(object)),
+                                 index=series.index)
+            if self._constant and not isinstance(categories.dtype, ArrowDtype):
+                # constant columns of any type stay encoded, an empty dictionary keeps its type for the targets
+                return pd.Series(pd.Categorical.from_codes(series.cat.codes, categories=pd.Index(categories.array)),
+                                 index=series.index)
+
+        # the converted values no longer need, or no longer fit, a dictionary
+        return self.convert(decode(series))
+
     def generate(self, rows: int) -> pd.Series:
         raise NotImplementedError("Subclasses of Column should implement either `generate` or `add_column`")
 
@@ -104,6 +200,92 @@ class Column(abc.ABC):
         return None
 
 
+def is_dictionary_type(dtype) -> bool:
+    """Whether values of `dtype` are stored as python objects, e.g. strings, and so benefit from dictionary encoding."""
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+def dictionary_encoded(values: pd.Series, codes: np.ndarray) -> pd.Series:
+    """Returns a column where each row is `values[code]` for the given `codes`, a code of -1 is a null.
+
+    When the values are python objects, like strings, the column is a Categorical so each distinct value is held once
+    and each row is a small integer code, Parquet and BigQuery targets keep this dictionary encoding when writing.
+    Numeric, Bool and Timestamp values are already stored compactly so they are expanded into a plain column.
+    """
+    if is_dictionary_type(values.dtype):
+        value_codes, categories = pd.factorize(values)
+        # -1 codes would otherwise index the last value rather than stay null
+        codes = np.where(codes < 0, -1, value_codes[codes])
+        return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object)))
+
+    return pd.Series(values.array.take(codes, allow_fill=True))
+
+
+def constant(value: pd.Series, rows: int) -> pd.Series:
+    """Returns a column where every one of the `rows` is the single item in `value`, or null if `value` is empty.
+
+    Whatever the type, the value is held once as the column's only category and each row is a one byte code, so wide
+    tables of Fixed and Empty columns cost a byte per row per column. Parquet writes these as dictionary encoded
+    columns and BigQuery types them from the category's type, consumers that need the values decode them.
+    """
+    codes = np.full(rows, 0 if len(value) else -1, dtype=np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(value.array)))
+
+
+def decode(series: pd.Series) -> pd.Series:
+    """Expands a dictionary encoded or Arrow backed column back into a column of its values."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(series.cat.categories.dtype)
+    if isinstance(series.array, ArrowArray):
+        return series.astype(object)
+    return series
+
+
+def with_nulls(series: pd.Series, mask: np.ndarray) -> pd.Series:
+    """Returns `series` with the rows where `mask` is True set to null.
+
+    Where possible the mask becomes the validity mask of a nullable array, so Int and Bool columns stay Int and Bool
+    rather than being upcast to float or object, and the values themselves are never copied row by row.
+    """
+    values = series.array
+    if isinstance(values, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        nullable = type(values)(values._data, values._mask | mask)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy(copy=True)
+        codes[mask] = -1
+        nullable = pd.Categorical.from_codes(codes, dtype=series.dtype)
+    elif isinstance(values, ArrowArray):
+        nullable = values.with_nulls(mask)
+    elif isinstance(values, pd.arrays.ArrowStringArray):
+        nullable = pd.arrays.ArrowStringArray(
+            pc.if_else(pa.array(mask), pa.scalar(None, type=pa.string()), values._data))
+    elif series.dtype.kind in "iu":
+        nullable = pd.arrays.IntegerArray(series.to_numpy(), mask.copy())
+    elif series.dtype.kind == "b":
+        nullable = pd.arrays.BooleanArray(series.to_numpy(), mask.copy())
+    elif series.dtype.kind in "fmM":
+        nullable = series.to_numpy(copy=True)
+        nullable[mask] = np.nan if series.dtype.kind == "f" else np.datetime64("NaT").astype(series.dtype)
+    else:
+        return series.mask(mask)
+
+    return pd.Series(nullable, index=series.index, name=series.name)
+
+
+def row_offset(df: pd.DataFrame) -> int:
+    """Returns the position of the first row of `df` within the whole table.
+
+    When a table is generated in chunks the table records where each chunk starts in the frame's `attrs`, columns that
+    depend on row position use this to carry on where the previous chunk stopped. Frames without it fall back to the
+    first `rowId`.
+    """
+    if "row_offset" in df.attrs:
+        return df.attrs["row_offset"]
+    if "rowId" in df and len(df) > 0:
+        return int(df["rowId"].iloc[0])
+    return 0
+
+
 @dataclass(kw_only=True)
 class Fixed(Column):
     """
@@ -111,6 +293,8 @@ class Fixed(Column):
 
     Fixed supports the following `data_types:` - Int, Bool, Float, Decimal, String and Timestamp.
 
+    The value is held once and each row is a one byte reference to it (a pandas Categorical), so Fixed columns cost very little memory however many rows there are.
+
     **Usage:**
     ```
     - name: my_fixed_col
@@ -126,25 +310,30 @@ class Fixed(Column):
     """
 
     value: any
+    _constant = True
 
     def generate(self, rows: int) -> pd.Series:
         match self.data_type:
             case 'Int':
-                return pd.Series(np.full(rows, self.value)).astype('float64').astype(self.pandas_type())
+                value = pd.Series([self.value]).astype('float64').astype(self.pandas_type())
             case 'Bool':
-                return pd.Series(np.full(rows, bool(self.value)), dtype=self.pandas_type())
+                value = pd.Series([bool(self.value)], dtype=self.pandas_type())
             case _:
-                return pd.Series(np.full(rows, self.value), dtype=self.pandas_type())
+                value = pd.Series([self.value], dtype=self.pandas_type())
+
+        return constant(value, rows)
 
 
 @dataclass(kw_only=True)
 class Empty(Column):
     """
-    An empty column.
+    An empty column of the given `data_type:`, held as a Categorical with no values so it costs a byte per row.
 
     """
-    def add_column(self, df: pd.DataFrame):
-        df[self.name] = pd.Series(np.full(len(df), np.nan), dtype=self.pandas_type())
+    _constant = True
+
+    def generate(self, rows: int) -> pd.Series:
+        return constant(pd.Series([], dtype=self.pandas_type()), rows)
 
 
 @dataclass(kw_only=True)
@@ -187,16 +376,41 @@ class MapValues(Column):
     values: dict
     default: any = np.nan
 
+    def inputs(self) -> List[str]:
+        return [self.source_column]
+
+    def __post_init__(self):
+        # the output's dictionary is built once from the mapped values and the default, rather than from the values
+        # each chunk happens to contain, so every chunk has the same categories even if nothing in it maps
+        outputs = list(self.values.values()) + ([] if pd.isnull(self.default) else [self.default])
+        output_codes, categories = pd.factorize(np.array(outputs, dtype=object))
+        self.categories = pd.Series(pd.array(list(categories)))
+        self.codes = dict(zip(self.values, output_codes[:len(self.values)]))
+        self.default_code = -1 if pd.isnull(self.default) else int(output_codes[-1])
+
     def add_column(self, df: pd.DataFrame):
-        df[self.name] = df[self.source_column].map(self.values).fillna(self.default)
+        source = df[self.source_column]
+        if isinstance(source.dtype, pd.CategoricalDtype):
+            source_codes, uniques = source.cat.codes.to_numpy(), source.cat.categories
+        else:
+            source_codes, uniques = pd.factorize(decode(source))
 
+        # map each distinct source value once to its code in the dictionary, with an extra entry at the end for null
+        # source values
+        lookup_codes = pd.Series(uniques, dtype=object).map(self.codes).fillna(self.default_code).to_numpy(np.int64)
+        lookup_codes = np.append(lookup_codes, self.default_code)
 
+        # then every row is a single gather from the lookup, -1 codes index the null entry
+        codes = lookup_codes[source_codes]
+        df[self.name] = dictionary_encoded(self.categories, codes)
 
+
+# nanoseconds per time_unit
 unit_factor = {
-    's' :1E9,
-    'ms':1E6,
-    'us':1E3,
-    'ns':1
+    's': 10**9,
+    'ms': 10**6,
+    'us': 10**3,
+    'ns': 1
 }
 
 @dataclass(kw_only=True)
@@ -239,10 +453,10 @@ class Random(Column):
     def generate(self, rows: int) -> pd.Series:
         match self.data_type:
             case 'Int' | 'Bool':
-                return pd.Series(np.random.randint(int(self.min), int(self.max)+1, rows), dtype=self.pandas_type())
+                return pd.Series(self.rng.integers(int(self.min), int(self.max)+1, rows), dtype=self.pandas_type())
 
             case 'Float' | 'Decimal':
-                return pd.Series(np.random.uniform(float(self.min), float(self.max)+1, rows)
+                return pd.Series(self.rng.uniform(float(self.min), float(self.max)+1, rows)
                                           .round(decimals=self.decimal_places),
                                  dtype=self.pandas_type())
 
@@ -250,23 +464,52 @@ class Random(Column):
                 # limit how long strings can be
                 self.min = min(int(self.min), self.str_max_chars)
                 self.max = min(int(self.max), self.str_max_chars)
-                return pd.Series(list(''.join(random.choices(string.ascii_letters, k=random.randint(self.min, self.max))) for _ in range(rows)), dtype=self.pandas_type())
+                return random_strings(self.rng, rows, self.min, self.max)
 
             case 'Timestamp' | 'Datetime':
-                date_ints_series = self.random_date_ints(self.min, self.max, rows, self.time_unit)
-                return pd.to_datetime(date_ints_series, unit=self.time_unit)
+                date_ints = self.random_date_ints(self.min, self.max, rows, self.time_unit)
+                # scaled to nanoseconds in place and viewed as timestamps, so no other copies are made
+                date_ints *= unit_factor[self.time_unit]
+                return pd.Series(date_ints.view('datetime64[ns]'))
 
             case 'TimestampAsInt':
-                date_ints_series = self.random_date_ints(self.min, self.max, rows, self.time_unit)
-                return date_ints_series
+                return pd.Series(self.random_date_ints(self.min, self.max, rows, self.time_unit))
 
             case _:
                 raise ColumnGenerationException(f"Data type [{self.data_type}] not recognised")
 
 
-    def random_date_ints(self, start, end, rows, unit='ms'):
-        start, end = pd.Timestamp(start), pd.Timestamp(end)
-        return pd.Series(np.random.uniform(start.value // unit_factor[unit], end.value // unit_factor[unit], rows)).astype(int)
+    def random_date_ints(self, start, end, rows, unit='ms') -> np.ndarray:
+        """Draws `rows` epoch ints in `unit` from `start` up to, but not including, `end`."""
+        if unit not in unit_factor:
+            raise Exception(f"time_unit: [{unit}] not recognised, should be one of {', '.join(unit_factor)}")
+        low, high = pd.Timestamp(start).value // unit_factor[unit], pd.Timestamp(end).value // unit_factor[unit]
+        return self.rng.integers(low, high, rows, dtype=np.int64, endpoint=low == high)
+
+
+ASCII_LETTERS = np.frombuffer(string.ascii_letters.encode(), dtype=np.uint8)
+
+
+def random_strings(rng: np.random.Generator, rows: int, min_length: int, max_length: int) -> pd.Series:
+    """Generates `rows` random strings of ascii letters with lengths between `min_length` and `max_length` inclusive.
+
+    Rather than building each string in python all the characters are drawn at once into a single buffer, which is
+    split into strings by an offsets array to form an Arrow backed string column without copying.
+    """
+    lengths = rng.integers(min_length, max_length, endpoint=True, size=rows)
+    offsets = np.zeros(rows + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    data = ASCII_LETTERS[rng.integers(0, len(ASCII_LETTERS), offsets[-1], dtype=np.uint8)]
+
+    rows_per_chunk = max(1, MAX_STRING_ARRAY_BYTES // max(max_length, 1))
+    chunks = [
+        pa.StringArray.from_buffers(
+            min(start + rows_per_chunk, rows) - start,
+            pa.py_buffer((offsets[start:start + rows_per_chunk + 1] - offsets[start]).astype(np.int32)),
+            pa.py_buffer(data[offsets[start]:offsets[min(start + rows_per_chunk, rows)]]))
+        for start in range(0, rows, rows_per_chunk)
+    ]
+    return pd.Series(pd.arrays.ArrowStringArray(pa.chunked_array(chunks, type=pa.string())))
 
 
 @dataclass(kw_only=True)
@@ -303,7 +546,7 @@ class Selection(Column):
     - `values:` the list of values to pick from, if the Bool `data_type` is specified then `values` is automatically set to [True, False].
 
     Optional params:
-    - `weights:` increases the likelyhood that certain `values` will be selected. Weights are applied in the same order as the list of `values`. All `values` are assigned a weight of 1 by default so only differing weights need to be specified.
+    - `weights:` increases the likelyhood that certain `values` will be selected. Weights are applied in the same order as the list of `values`. All `values` are assigned a weight of 1 by default so only differing weights need to be specified. Weights are relative so they can be any size, `[990000, 10000]` is the same as `[99, 1]`.
 
     """
     
@@ -318,13 +561,20 @@ class Selection(Column):
         elif not self.values:
             raise Exception("no `values:` were provided ")
 
+        self.probabilities = None
         if self.weights:
-            value_weight_pairs = list(zip_longest(self.values, self.weights[0:len(self.values)], fillvalue=1))
-            self.values = list(chain(*[list([k] * v) for k, v in value_weight_pairs]))
+            # values without a weight default to 1 and any extra weights are ignored
+            weights = [w for _, w in zip_longest(self.values, self.weights[0:len(self.values)], fillvalue=1)]
+            weights = np.array(weights, dtype='float64')
+
+            if (weights < 0).any() or weights.sum() <= 0:
+                raise Exception(f"`weights:` must not be negative and at least one must be positive, got {self.weights}")
 
+            self.probabilities = weights / weights.sum()
 
     def generate(self, rows: int) -> pd.Series:
-        return pd.Series(np.random.choice(self.values, rows, replace=True), dtype=self.pandas_type())
+        indices = self.rng.choice(len(self.values), rows, replace=True, p=self.probabilities)
+        return dictionary_encoded(pd.Series(np.array(self.values), dtype=self.pandas_type()), indices)
 
 
 @dataclass(kw_only=True)
@@ -358,24 +608,65 @@ class Sequential(Column):
     step: any = 1
 
     def add_column(self, df: pd.DataFrame) -> None:
+        offset = row_offset(df)
         match self.data_type:
+            case 'Int' if is_int(self.start) and is_int(self.step):
+                df[self.name] = sequential_ints(int(self.start), int(self.step), len(df), offset)
+
             case 'Int' | 'Decimal' | 'Float' | None:
-        
-                df[self.name] = (df['rowId'] * float(self.step) + float(self.start)).round(decimals=self.decimal_places)
+                positions = np.arange(offset, offset + len(df), dtype=np.float64)
+                df[self.name] = (positions * float(self.step) + float(self.start)).round(decimals=self.decimal_places)
 
             case 'Timestamp' | 'Datetime':
-                df[self.name] = pd.date_range(start=self.start, periods=len(df), freq=self.step)
+                freq = to_offset(self.step)
+                if isinstance(freq, Tick):
+                    # fixed size steps can jump straight to the first row of this chunk
+                    start = pd.Timestamp(self.start) + offset * freq
+                    df[self.name] = pd.date_range(start=start, periods=len(df), freq=freq)
+                else:
+                    # calendar based steps e.g. months aren't a fixed size so generate from the start and skip ahead
+                    df[self.name] = pd.date_range(start=self.start, periods=offset + len(df), freq=freq)[offset:]
 
             case _:
                 raise ColumnGenerationException(f"Data type [{self.data_type}] not recognised")
 
 
+def is_int(value) -> bool:
+    """Whether `value` is a whole number, e.g. `3`, `3.0` or `"3"`, rather than one that `int` would truncate."""
+    if isinstance(value, (int, np.integer)):
+        return True
+    if isinstance(value, (float, np.floating)):
+        return float(value).is_integer()
+    if isinstance(value, str):
+        try:
+            int(value)
+        except ValueError:
+            return False
+        return True
+    return False
+
+
+def sequential_ints(start: int, step: int, rows: int, offset: int = 0) -> np.ndarray:
+    """Returns the `rows` ints of the sequence `start`, `start + step`, ... beginning at position `offset`.
+
+    The values are computed as int64s, so unlike floats they stay exact for the whole int64 range.
+    """
+    first, last = start + offset * step, start + (offset + max(rows - 1, 0)) * step
+    if not -2**63 <= min(first, last) <= max(first, last) < 2**63:
+        raise Exception(f"Sequence from [{first}] to [{last}] does not fit in a 64 bit int")
+
+    values = np.arange(rows, dtype=np.int64)
+    values *= step
+    values += first
+    return values
+
+
 @dataclass(kw_only=True)
 class Map(Column):
     """
     Creates a Map based on the specified `columns:` or `source_columns:`.
 
-    Typically you would not specify data_type for this column, the only exception is if you want the output serialised as a JSON string, use `data_type: String`.
+    Typically you would not specify data_type for this column, the only exception is if you want the output serialised as a JSON string, use `data_type: String`. Otherwise the Map is an Arrow struct built from the columns' values, which Parquet and BigQuery targets write as a nested record.
 
     You can either specify a list of `source_columns:` that refer to previously created data, or defined further `columns:` to generate them inline.
 
@@ -414,40 +705,61 @@ class Map(Column):
     drop: bool = False
     select_one: bool = False
 
+    def seed(self, seed_sequence: np.random.SeedSequence) -> None:
+        super().seed(seed_sequence)
+        for sub_col, sub_seed in zip(self.columns, seed_sequence.spawn(len(self.columns))):
+            sub_col.seed(sub_seed)
+
+    def inputs(self) -> List[str] | None:
+        # the sub columns can read earlier sub columns as well as the table's columns
+        inputs, created = list(self.source_columns), set()
+        for sub_col in self.columns:
+            sub_inputs = sub_col.inputs()
+            if sub_inputs is None:
+                return None
+            inputs += [name for name in sub_inputs if name not in created and name not in inputs]
+            created.update(sub_col.outputs())
+        return inputs
+
+    def outputs(self) -> List[str]:
+        # select_one blanks values in the source columns
+        return [self.name] + (self.source_columns if self.select_one and not self.drops() else [])
+
+    def drops(self) -> List[str]:
+        if self.drop or self.columns:
+            return self.source_columns + [sub_col.name for sub_col in self.columns]
+        return []
+
     def add_column(self, df: pd.DataFrame) -> None:
-        if self.columns:
-            self.drop = True
-            for sub_col in self.columns:
-                self.source_columns.append(sub_col.name)
-                sub_col.maybe_add_column(df)
+        # add_column runs once per chunk so the config itself is left untouched
+        source_columns = self.source_columns + [sub_col.name for sub_col in self.columns]
+        drop = self.drop or bool(self.columns)
 
+        for sub_col in self.columns:
+            sub_col.maybe_add_column(df)
 
         if self.select_one:
             # randomly select one source_column per row and blank all other columns on that row
-            chosen_cols = df[self.source_columns].columns.to_series().sample(len(df), replace=True, ignore_index=True)
-            for col in self.source_columns:
-                df.loc[chosen_cols != col, col] = np.nan
+            chosen_cols = self.rng.integers(0, len(source_columns), len(df))
+            for i, col in enumerate(source_columns):
+                df[col] = with_nulls(df[col], chosen_cols != i)
 
         if self.data_type == 'String':
-            df[self.name] = pd.Series(df[self.source_columns].to_json(orient='records', lines=True).splitlines()).astype("string")
+            # timestamps are epoch milliseconds, as pandas' to_json wrote them before
+            json_lines = to_json_lines(df[source_columns], date_format="epoch", time_unit="ms")
+            df[self.name] = to_string_series(json_lines, df.index)
         else:
-            df[self.name] = df[self.source_columns].to_dict(orient='records')
+            df[self.name] = to_struct(df, source_columns)
 
-        if self.drop:
-            df.drop(columns=self.source_columns, inplace=True)
-
-def pandas_types_json_serialiser(val):
-    if pd.isnull(val):
-        return None
-    else:
-        return val
+        if drop:
+            drop_columns(df, source_columns)
 
 @dataclass(kw_only=True)
 class Array(Column):
     """
     Creates a Array based on the specified `source_columns:`.
 
-    Typically you would not specify data_type for this column, the only exception is if you want the output serialised as a JSON string, use `data_type: String`.
+    Typically you would not specify data_type for this column, the only exception is if you want the output serialised as a JSON string, use `data_type: String`. Otherwise, when the `source_columns:` have compatible types, the Array is an Arrow list which Parquet and BigQuery targets write as a repeated field.
 
     **Usage:**
     ```
@@ -482,19 +794,27 @@ class Array(Column):
     drop: bool = True
     drop_nulls: bool = False
 
+    def inputs(self) -> List[str]:
+        return list(self.source_columns)
+
+    def drops(self) -> List[str]:
+        return list(self.source_columns) if self.drop else []
+
     def add_column(self, df: pd.DataFrame) -> None:
-        if self.drop_nulls:
-            fields = df[self.source_columns].apply(lambda x: np.array(x[x.notnull()]), axis=1)
-        else:
-            fields = pd.Series(list(df[self.source_columns].values))
-        
         if self.data_type == 'String':
-            df[self.name] = fields.apply(lambda x: json.dumps(list(x), default=pandas_types_json_serialiser)).astype('string')
+            df[self.name] = to_string_series(to_json_arrays(df[self.source_columns], self.drop_nulls), df.index)
         else:
+            fields = to_list(df, self.source_columns, self.drop_nulls)
+            if fields is None:
+                # the source columns' types differ so the arrays can only be held as python objects
+                if self.drop_nulls:
+                    fields = df[self.source_columns].apply(lambda x: np.array(x[x.notnull()]), axis=1)
+                else:
+                    fields = pd.Series(list(df[self.source_columns].values))
             df[self.name] = fields
-        
+
         if self.drop:
-            df.drop(columns=self.source_columns, inplace=True)
+            drop_columns(df, self.source_columns)
 
 
 @dataclass(kw_only=True)
@@ -528,9 +848,12 @@ class Series(Column):
 
     values: List[str] = field(default_factory=list)
 
-    def generate(self, rows: int) -> pd.Series:
-        repeats = rows // len(self.values) + 1
-        return pd.Series(np.tile(self.values, repeats)[0:rows])
+    def add_column(self, df: pd.DataFrame) -> None:
+        df[self.name] = self.generate(len(df), row_offset(df))
+
+    def generate(self, rows: int, offset: int = 0) -> pd.Series:
+        positions = np.arange(offset, offset + rows) % len(self.values)
+        return dictionary_encoded(pd.Series(np.array(self.values)), positions)
 
 
 @dataclass(kw_only=True)
@@ -568,27 +891,212 @@ class ExtractDate(Column):
 
     source_column: str
 
+    def inputs(self) -> List[str]:
+        return [self.source_column]
+
     def add_column(self, df: pd.DataFrame) -> None:
+        # timestamps collapse to relatively few dates so each distinct date is formatted once and then broadcast
         match self.data_type:
-            case 'String' | 'Int':
-                df[self.name] = df[self.source_column].dt.strftime(self.date_format)
+            case 'String':
+                codes, dates = factorize_timestamps(decode(df[self.source_column]), format_resolution(self.date_format))
+                values = format_timestamps(pd.Series(dates), self.date_format).array
+            case 'Int':
+                codes, dates = factorize_timestamps(decode(df[self.source_column]), format_resolution(self.date_format))
+                values = pd.array(format_timestamps(pd.Series(dates), self.date_format).to_numpy(dtype=object)
+                                  .astype("int64"), dtype="Int64")
             case 'Date':
-                df[self.name] = df[self.source_column].dt.date
+                codes, dates = factorize_timestamps(decode(df[self.source_column]), "D")
+                values = dates.date
             case _:
                 raise NotImplementedError(f"data_type: [{self.data_type}] is not implemented for the ExtractDate column_type")
 
+        df[self.name] = pd.Series(take(values, codes, allow_fill=True), index=df.index)
+
 
 @dataclass(kw_only=True)
 class Eval(Column):
     """
-    An eval column
+    Evaluates a pandas `expression:` over the previously created columns.
+
+    **Usage:**
+    ```
+    - col: price Random Float 1 100
+    - col: quantity Random Int 1 10
+
+    - name: total
+      column_type: Eval
+      expression: price * quantity
+    ```
 
+    **Concise syntax:**
+    ```
+    - col: total Eval Float "price * quantity"
+    ```
+
+    Required params:
+    - `expression:` the expression to evaluate, see https://pandas.pydata.org/docs/reference/api/pandas.eval.html
+
+    Optional params:
+    - `engine:` the pandas eval engine, `numexpr` or `python`. Defaults to `numexpr` when it's installed.
+
+    Consecutive Eval columns are evaluated together in a single pass.
     """
 
     expression: str
+    engine: str = None
+
+    def __post_init__(self):
+        if self.engine is None:
+            self.engine = "numexpr" if numexpr_installed() else "python"
+        elif self.engine not in ("numexpr", "python"):
+            raise Exception(f"engine: [{self.engine}] not recognised, should be one of numexpr, python")
+
+        # the expression is parsed once, up front, to find the columns it uses
+        self.names = expression_names(self.expression)
 
     def add_column(self, df: pd.DataFrame) -> None:
-        df[self.name] = df.eval(self.expression)
+        df[self.name] = df.eval(self.expression, engine=self.engine, resolvers=(decoded_columns(df, [self]),))
+
+    def inputs(self) -> List[str] | None:
+        if self.names is None:
+            return None
+        return sorted(self.names - EVAL_BUILTINS)
+
+    def needs_post_process(self) -> bool:
+        return bool(self.null_percentage or self.data_type or self.output_type)
+
+
+# names pandas eval provides itself rather than looking up in the frame
+EVAL_BUILTINS = {"True", "False", "inf", "Inf", "list", "tuple", "datetime", "Timestamp", "index"}
+
+
+def expression_names(expression: str) -> set | None:
+    """Returns the names an expression refers to, or None if it uses syntax only pandas understands, e.g. backticks.
+
+    Functions, e.g. `sin(x)`, aren't columns so their names are left out.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        return None
+    functions = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and id(node) not in functions}
+
+
+def decoded_columns(df: pd.DataFrame, evals: list) -> dict:
+    """Decodes the dictionary encoded and Arrow backed columns the `evals` use, as expressions operate on values.
+
+    numexpr only evaluates numpy arrays so for that engine the other pandas extension columns, e.g. nullable Int and
+    String columns, are passed as numpy arrays too.
+    """
+    def used(name):
+        return any(str(name) in e.expression if e.names is None else name in e.names for e in evals)
+
+    numexpr = evals[0].engine == "numexpr"
+    if any(e.names is None for e in evals):
+        candidates = df.columns
+    else:
+        # only look at the columns the expressions use, wide tables have far more columns than any expression
+        candidates = [name for name in set().union(*(e.names for e in evals)) if name in df]
+
+    columns = {}
+    for name in candidates:
+        series = df[name]
+        if isinstance(series.dtype, (pd.CategoricalDtype, ArrowDtype)) and used(name):
+            series = decode(series)
+            columns[name] = series
+        if numexpr and isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and used(name):
+            columns[name] = pd.Series(numpy_values(series), index=series.index)
+    return columns
+
+
+def numpy_values(series: pd.Series) -> np.ndarray:
+    """Returns the values of a pandas extension column as a numpy array, nullable Ints with nulls become floats."""
+    if isinstance(series.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray)):
+        dtype = np.float64 if series.hasnans else series.dtype.numpy_dtype
+        return series.to_numpy(dtype=dtype, na_value=np.nan)
+    if isinstance(series.array, pd.arrays.BooleanArray) and not series.hasnans:
+        return series.to_numpy(dtype=bool)
+    return series.to_numpy(dtype=object, na_value=None)
+
+
+def numexpr_installed() -> bool:
+    try:
+        import numexpr
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass(kw_only=True)
+class EvalGroup:
+    """Consecutive Eval columns evaluated together as one multi line expression, e.g. `a = x + y` then `b = a * 2`.
+
+    The group's expression is built once and evaluated in a single pass per chunk rather than setting up an eval per
+    column.
+    """
+    columns: List[Eval]
+
+    def __post_init__(self):
+        self.expression = "\n".join(f"{e.name} = {e.expression}" for e in self.columns)
+
+    def is_independent(self) -> bool:
+        return False
+
+    def maybe_add_column(self, df: pd.DataFrame) -> None:
+        try:
+            df.eval(self.expression, engine=self.columns[0].engine, resolvers=(decoded_columns(df, self.columns),),
+                    inplace=True)
+        except Exception:
+            # evaluate the columns one at a time so the error is reported against the column that caused it
+            for e in self.columns:
+                e.maybe_add_column(df)
+            return
+
+        for e in self.columns:
+            try:
+                e.post_process(df)
+            except Exception as ex:
+                raise ColumnGenerationException(f"Error on column [{e.name}]. Caused by: {ex}.")
+
+
+def is_eval_target(name: str) -> bool:
+    return isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name)
+
+
+def can_group(group: List[Eval], e: Eval) -> bool:
+    """Whether `e` can be evaluated along with the Evals in `group`.
+
+    It can't if it uses a column from the group that's changed after it's evaluated, i.e. has nulls added or its type
+    converted, as within the group it would see the values from before those changes.
+    """
+    if e.engine != group[0].engine or not is_eval_target(e.name):
+        return False
+    post_processed = {g.name for g in group if g.needs_post_process()}
+    if e.names is None:
+        return not post_processed
+    return not (e.names & post_processed)
+
+
+def drop_columns(df: pd.DataFrame, names: List[str]) -> None:
+    """Removes `names` from `df` one at a time, unlike `df.drop` this doesn't copy the columns that are left."""
+    for name in dict.fromkeys(names):
+        del df[name]
+
+
+def plan_columns(columns: list) -> list:
+    """Returns the steps to generate `columns` in order, with runs of Eval columns grouped into `EvalGroup`s."""
+    groups = []
+    for col in columns:
+        if isinstance(col, Eval) and groups and isinstance(groups[-1], list) and can_group(groups[-1], col):
+            groups[-1].append(col)
+        elif isinstance(col, Eval) and is_eval_target(col.name):
+            groups.append([col])
+        else:
+            groups.append(col)
+
+    return [EvalGroup(columns=g) if isinstance(g, list) and len(g) > 1 else g[0] if isinstance(g, list) else g
+            for g in groups]
 
 
 @dataclass(kw_only=True)
@@ -614,6 +1122,10 @@ class TimestampOffset(Column):
     Required params:
     - `min:` the lower bound
     - `max:` the uppper bound
+    - `source_column:` the Timestamp column to offset, nulls in it stay null
+
+    Optional params:
+    - `time_unit:` one of 's', 'ms', 'us', 'ns'. The offsets are whole numbers of this unit, default is 's'.
 
     `min:` and `max:` should  be specified in pandas offset format see https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases.
     """
@@ -622,11 +1134,30 @@ class TimestampOffset(Column):
     source_column: str
     time_unit: str = "s"
 
-    def add_column(self, df: pd.DataFrame) -> None:
-        low = pd.Timedelta(self.min).total_seconds()
-        high = pd.Timedelta(self.max).total_seconds()
+    def inputs(self) -> List[str]:
+        return [self.source_column]
 
-        df[self.name] = df[self.source_column] + pd.to_timedelta(np.random.uniform(low, high, size=len(df)), 's').round(self.time_unit)
+    def add_column(self, df: pd.DataFrame) -> None:
+        if self.time_unit not in unit_factor:
+            raise Exception(f"time_unit: [{self.time_unit}] not recognised, should be one of {', '.join(unit_factor)}")
+
+        source = decode(df[self.source_column])
+        if not pd.api.types.is_datetime64_any_dtype(source.dtype):
+            raise Exception(f"source_column: [{self.source_column}] should be a Timestamp column but was [{source.dtype}]")
+
+        # offsets are drawn as whole time_units and added to the source's nanoseconds in place
+        factor = unit_factor[self.time_unit]
+        low, high = round(pd.Timedelta(self.min).value / factor), round(pd.Timedelta(self.max).value / factor)
+        values = self.rng.integers(low, high, len(df), dtype=np.int64, endpoint=True)
+        values *= factor
+        values += source.array.asi8
+
+        nulls = source.isnull().to_numpy()
+        if nulls.any():
+            values[nulls] = np.iinfo(np.int64).min  # NaT
+
+        df[self.name] = pd.Series(pd.arrays.DatetimeArray(values.view('datetime64[ns]'), dtype=source.dtype),
+                                  index=source.index)
 
 
 class ColumnGenerationException(Exception):
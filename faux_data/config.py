@@ -22,14 +22,6 @@ from dynaconf import Dynaconf, Validator
 
 log = logging.getLogger(__name__)
 
-settings = Dynaconf(
-    envvar_prefix="FAUXDATA",
-    settings_files=[
-        Path.home() / '.fauxdata/config.toml',
-    ],
-)
-
-
 def default_gcp_project_id(settings, validator):
     if settings.get("gcp_project_id"):
         return
@@ -39,11 +31,17 @@ def default_gcp_project_id(settings, validator):
         return "NOTSET"
 
 
-settings.validators.register(Validator("DEPLOYMENT_MODE", default="local"))
-settings.validators.register(
-    Validator("GCP_PROJECT_ID", default=default_gcp_project_id))
-
-settings.validators.validate_all()
+# the settings are loaded and validated when they're first used rather than on import
+settings = Dynaconf(
+    envvar_prefix="FAUXDATA",
+    settings_files=[
+        Path.home() / '.fauxdata/config.toml',
+    ],
+    validators=[
+        Validator("DEPLOYMENT_MODE", default="local"),
+        Validator("GCP_PROJECT_ID", default=default_gcp_project_id),
+    ],
+)
 
 
 def log_config():
@@ -0,0 +1,178 @@
+#    Copyright 2022 @jack-tee
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Helpers for formatting Timestamp columns."""
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .arrays import MAX_STRING_ARRAY_BYTES
+
+NS_PER_DAY = 86_400 * 10**9
+
+# the strftime directives that format_timestamps computes itself, with the number of digits each produces
+FIXED_WIDTH_DIRECTIVES = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2, "f": 6}
+
+# the strftime directives that only depend on the date, and the timezone, not the time of day
+DAY_DIRECTIVES = {"Y", "y", "C", "G", "g", "m", "b", "B", "h", "d", "e", "j", "a", "A", "u", "w", "U", "W", "V", "D",
+                  "F", "x", "z", "Z", "n", "t"}
+
+
+def format_resolution(date_format: str) -> str | None:
+    """Returns the coarsest frequency that keeps every field `date_format` shows, or None if it needs full precision.
+
+    Timestamps that are the same at this resolution format to the same string, e.g. `%Y-%m` only needs the day.
+    Directives may have glibc flags or modifiers, e.g. `%-H` or `%Ey`, and any directive that isn't known here needs
+    full precision.
+    """
+    directives = set(re.findall(r"%[-_0^#]?[EO]?(.)", date_format.replace("%%", "")))
+    if directives - DAY_DIRECTIVES - {"H", "I", "p", "k", "l", "M", "R", "S", "T", "X", "c", "r"}:
+        return None
+    if directives & {"S", "T", "X", "c", "r"}:
+        return "S"
+    if directives & {"M", "R"}:
+        return "T"
+    if directives & {"H", "I", "p", "k", "l"}:
+        return "H"
+    return "D"
+
+
+def factorize_timestamps(series: pd.Series, freq: str | None) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """Floors the timestamps to `freq` and returns codes into the distinct floored timestamps, -1 for nulls."""
+    if freq is not None:
+        series = series.dt.floor(freq)
+    codes, uniques = pd.factorize(series)
+    return codes, pd.DatetimeIndex(uniques)
+
+
+def format_timestamps(series: pd.Series, date_format: str) -> pd.Series:
+    """Formats a Timestamp column as strings using the strftime style `date_format`, returning an Arrow string column.
+
+    Formats made up of %Y, %m, %d, %H, %M, %S, %f and plain characters, like ISO 8601 or `%Y-%m-%d %H:%M:%S`, and `%s`
+    for epoch seconds are computed with integer arithmetic over the whole column. Other formats use strftime.
+    """
+    values = series.to_numpy(dtype="datetime64[ns]")
+    nulls = np.isnat(values)
+    nanos = np.where(nulls, 0, values.view(np.int64))
+
+    if date_format == "%s":
+        strings = pa.array(np.floor_divide(nanos, 10**9)).cast(pa.string())
+    else:
+        parts = parse_fixed_width_format(date_format)
+        if parts is None:
+            return series.dt.strftime(date_format).astype("string")
+        strings = fixed_width_strings(fixed_width_characters(nanos, parts))
+
+    if nulls.any():
+        strings = pc.if_else(pa.array(nulls), pa.scalar(None, type=pa.string()), strings)
+
+    return pd.Series(pd.arrays.ArrowStringArray(strings), index=series.index)
+
+
+def json_timestamps(series: pd.Series, date_format: str = "iso", time_unit: str = "ms") -> np.ndarray:
+    """Converts a Timestamp column to an object array of ISO 8601 strings, or epoch ints if `date_format` is epoch.
+
+    Both are truncated to `time_unit` and nulls are None.
+    """
+    values = series.to_numpy(dtype=f"datetime64[{time_unit}]")
+    if date_format == "epoch":
+        formatted = values.view(np.int64).astype(object)
+    else:
+        formatted = np.datetime_as_string(values, unit=time_unit).astype(object)
+    formatted[np.isnat(values)] = None
+    return formatted
+
+
+def parse_fixed_width_format(date_format: str) -> List[str | bytes] | None:
+    """Splits `date_format` into directives and literal bytes, or returns None if it can't be formatted as fixed width."""
+    parts = []
+    for directive, literal in re.findall(r"%(.?)|([^%]+)", date_format):
+        if literal:
+            if not literal.isascii():
+                return None
+            parts.append(literal.encode())
+        elif directive == "%":
+            parts.append(b"%")
+        elif directive in FIXED_WIDTH_DIRECTIVES:
+            parts.append(directive)
+        else:
+            return None
+    return parts
+
+
+def fixed_width_characters(nanos: np.ndarray, parts: List[str | bytes]) -> np.ndarray:
+    """Writes the characters of each formatted timestamp into a row of a 2d array of bytes."""
+    days, time_of_day = np.divmod(nanos, NS_PER_DAY)
+    fields = {
+        "H": time_of_day // (3600 * 10**9),
+        "M": time_of_day // (60 * 10**9) % 60,
+        "S": time_of_day // 10**9 % 60,
+        "f": time_of_day // 1000 % 10**6,
+    }
+    if any(part in ("Y", "m", "d") for part in parts):
+        fields["Y"], fields["m"], fields["d"] = civil_from_days(days)
+
+    width = sum(len(part) if isinstance(part, bytes) else FIXED_WIDTH_DIRECTIVES[part] for part in parts)
+    characters = np.empty((len(nanos), width), dtype=np.uint8)
+
+    position = 0
+    for part in parts:
+        if isinstance(part, bytes):
+            characters[:, position:position + len(part)] = np.frombuffer(part, dtype=np.uint8)
+            position += len(part)
+        else:
+            digits = FIXED_WIDTH_DIRECTIVES[part]
+            value = fields[part]
+            for digit in range(digits):
+                characters[:, position + digits - 1 - digit] = ord("0") + value // 10**digit % 10
+            position += digits
+
+    return characters
+
+
+def fixed_width_strings(characters: np.ndarray) -> pa.ChunkedArray:
+    """Turns a 2d array of bytes into Arrow strings, one per row, without copying the bytes into python strings."""
+    rows, width = characters.shape
+    data = characters.reshape(-1)
+    rows_per_chunk = max(1, MAX_STRING_ARRAY_BYTES // max(width, 1))
+    chunks = [
+        pa.StringArray.from_buffers(
+            min(start + rows_per_chunk, rows) - start,
+            pa.py_buffer(np.arange(0, (min(start + rows_per_chunk, rows) - start + 1) * width, width, dtype=np.int32)),
+            pa.py_buffer(data[start * width:min(start + rows_per_chunk, rows) * width]))
+        for start in range(0, rows, rows_per_chunk)
+    ]
+    return pa.chunked_array(chunks, type=pa.string())
+
+
+def civil_from_days(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Converts days since 1970-01-01 into year, month and day arrays.
+
+    This is Howard Hinnant's days_from_civil algorithm in reverse, see http://howardhinnant.github.io/date_algorithms.html
+    """
+    z = days + 719468
+    era = np.floor_divide(z, 146097)
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
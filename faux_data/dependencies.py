@@ -0,0 +1,166 @@
+#    Copyright 2022 @jack-tee
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""The dependencies between a table's columns, worked out from their definitions before any data is generated.
+
+Columns are generated in the order they're defined so a column can only use columns defined before it. A column
+reads the latest column with a name that's been defined, and not dropped, before it. For example:
+
+```
+- col: a Random Int 1 10
+- col: b Eval Int "a + 1"      # reads a
+- col: a Eval Int "b * 2"      # reads b and replaces a
+- col: c Eval Int "a + b"      # reads the second a
+```
+"""
+
+from typing import Dict, List, Set
+
+
+def column_dependencies(columns: list, initial: Set[str] | None) -> List[Set[int]]:
+    """Returns the positions of the columns each column reads, -1 is a column the table starts with, e.g. `rowId`.
+
+    `initial` are the names of the columns the table starts with, or None if they aren't known until the table is
+    generated, e.g. when the rows come from a file, in which case references to unknown columns are assumed to be in
+    it. Raises an exception listing every reference to a column that doesn't exist, is only created after the column
+    that uses it, is in a cycle or has been dropped.
+    """
+    # the position of the column that currently provides each name
+    provided = {name: -1 for name in initial or ()}
+    dropped_by = {}
+    dependencies, problems, forward = [], [], {}
+
+    for i, col in enumerate(columns):
+        inputs = col.inputs()
+        if inputs is None:
+            # the references can't be worked out, so it depends on everything before it
+            dependencies.append(set(provided.values()))
+        else:
+            dependencies.append(set())
+            for name in inputs:
+                if name in provided:
+                    dependencies[i].add(provided[name])
+                elif later_column(columns, i, name) is not None:
+                    forward[i] = forward.get(i, []) + [(name, later_column(columns, i, name))]
+                elif name in dropped_by:
+                    problems.append(f"Column [{col.name}] uses [{name}] which was dropped by column [{dropped_by[name]}]")
+                elif initial is not None:
+                    problems.append(f"Column [{col.name}] uses [{name}] which does not exist")
+
+        for name in col.drops():
+            if name in provided:
+                del provided[name]
+                dropped_by[name] = col.name
+        for name in col.outputs():
+            provided[name] = i
+            dropped_by.pop(name, None)
+
+    for i, references in forward.items():
+        for name, j in references:
+            cycle = find_cycle(forward, dependencies, j, i)
+            if cycle:
+                path = " -> ".join(f"[{columns[k].name}]" for k in [i] + cycle)
+                problems.append(f"Columns form a cycle {path}")
+            else:
+                problems.append(f"Column [{columns[i].name}] uses [{name}] which is only created after it")
+
+    if problems:
+        raise Exception("Invalid column references. " + ". ".join(problems))
+
+    return dependencies
+
+
+def later_column(columns: list, i: int, name: str) -> int | None:
+    """The position of the first column after `i` that creates `name`."""
+    for j in range(i + 1, len(columns)):
+        if name in columns[j].outputs():
+            return j
+    return None
+
+
+def find_cycle(forward: dict, dependencies: List[Set[int]], start: int, target: int) -> List[int] | None:
+    """Follows the references from `start`, returning the path back to `target` if there is one."""
+    stack, seen = [(start, [start])], set()
+    while stack:
+        node, path = stack.pop()
+        if node == target:
+            return path
+        if node in seen:
+            continue
+        seen.add(node)
+        references = [j for j in dependencies[node] if j >= 0] + [j for _, j in forward.get(node, [])]
+        stack.extend((j, path + [j]) for j in references)
+    return None
+
+
+def needed_columns(columns: list, dependencies: List[Set[int]], output_columns: List[str],
+                   initial: Set[str] | None) -> Set[int]:
+    """Returns the positions of the columns that `output_columns` are read from, directly or through other columns.
+
+    The rest of the columns don't need to be generated. Raises an exception if an output column doesn't exist, unless
+    `initial` is None in which case it's assumed to be one the table starts with.
+    """
+    provided = final_columns(columns, initial)
+
+    missing = [name for name in output_columns if name not in provided and initial is not None]
+    if missing:
+        raise Exception(f"output_columns: {missing} are not columns of the table")
+
+    needed, pending = set(), [provided[name] for name in output_columns if name in provided]
+    while pending:
+        i = pending.pop()
+        if i >= 0 and i not in needed:
+            needed.add(i)
+            pending.extend(dependencies[i])
+    return needed
+
+
+def final_columns(columns: list, initial: Set[str] | None) -> Dict[str, int]:
+    """Returns the position of the column that provides each name once every column has been generated."""
+    provided = {name: -1 for name in initial or ()}
+    for i, col in enumerate(columns):
+        for name in col.drops():
+            provided.pop(name, None)
+        for name in col.outputs():
+            provided[name] = i
+    return provided
+
+
+def column_releases(columns: list, dependencies: List[Set[int]], steps: List[List[int]],
+                    keep: Set[str]) -> List[List[str]]:
+    """Returns the names of the columns that can be removed after each step as nothing after it reads them.
+
+    `steps` are the positions of the columns generated by each step, in order, and `keep` the names of the output
+    columns which are never removed, so that a column replaced by a later one stays where it is in the output.
+    """
+    last_read = {}
+    for positions in steps:
+        for j in positions:
+            for i in dependencies[j]:
+                last_read[i] = max(last_read.get(i, j), j)
+
+    provided, releases = {}, []
+    for positions in steps:
+        for j in positions:
+            for name in columns[j].drops():
+                provided.pop(name, None)
+            for name in columns[j].outputs():
+                provided[name] = j
+
+        release = [name for name, i in provided.items() if name not in keep and last_read.get(i, i) <= max(positions)]
+        for name in release:
+            del provided[name]
+        releases.append(release)
+
+    return releases
@@ -0,0 +1,109 @@
+#    Copyright 2022 @jack-tee
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""JSON encoding of rows, shared by the Map and Array columns and the Pubsub target.
+
+Each column is converted to JSON ready python values in one pass, rather than per row, so every column type is
+encoded the same way wherever the JSON is produced:
+
+- nulls, NaN and NaT are `null`
+- Timestamps are ISO 8601 strings e.g. `2022-01-01T10:00:01.500` or, with `date_format="epoch"`, ints in `time_unit`
+- Decimals are numbers
+- Maps are objects and Arrays are arrays
+
+Rows are encoded with orjson if it's installed, otherwise the standard library's json module.
+"""
+
+import datetime
+import json
+from decimal import Decimal
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .arrays import ArrowArray
+from .datetimes import json_timestamps
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def to_json_lines(df: pd.DataFrame, date_format: str = "iso", time_unit: str = "ms") -> List[bytes]:
+    """Encodes each row of `df` as a compact JSON object, returning one bytes value per row."""
+    names = [str(name) for name in df.columns]
+    columns = [json_values(df[name], date_format, time_unit) for name in df.columns]
+    dumps = encoder(date_format, time_unit)
+    return [dumps(dict(zip(names, row))) for row in zip(*columns)] if columns else [dumps({})] * len(df)
+
+
+def to_json_arrays(df: pd.DataFrame, drop_nulls: bool = False, date_format: str = "iso",
+                   time_unit: str = "ms") -> List[bytes]:
+    """Encodes each row of `df` as a compact JSON array, returning one bytes value per row."""
+    columns = [json_values(df[name], date_format, time_unit) for name in df.columns]
+    dumps = encoder(date_format, time_unit)
+    if not columns:
+        return [dumps([])] * len(df)
+    if drop_nulls:
+        return [dumps([value for value in row if value is not None]) for row in zip(*columns)]
+    return [dumps(list(row)) for row in zip(*columns)]
+
+
+def to_string_series(rows: List[bytes], index: pd.Index = None) -> pd.Series:
+    """Turns encoded rows into an Arrow backed string column without decoding each row in python."""
+    return pd.Series(pd.arrays.ArrowStringArray(pa.array(rows, type=pa.binary()).cast(pa.string())), index=index)
+
+
+def json_values(series: pd.Series, date_format: str = "iso", time_unit: str = "ms") -> list:
+    """Converts a column into a list of JSON ready python values, with None for nulls."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+
+    if isinstance(series.array, ArrowArray):
+        return series.array.to_pylist()
+
+    if series.dtype.kind == "M":
+        return json_timestamps(series, date_format, time_unit).tolist()
+
+    return series.to_numpy(dtype=object, na_value=None).tolist()
+
+
+def encoder(date_format: str = "iso", time_unit: str = "ms") -> Callable[[object], bytes]:
+    """Returns a function that encodes a single row as compact JSON bytes."""
+    def default(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (datetime.datetime, datetime.date, np.datetime64)):
+            timestamp = pd.Timestamp(value)
+            if date_format == "epoch":
+                return timestamp.value // pd.Timedelta(1, unit=time_unit).value
+            if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+                return value.isoformat()
+            return str(np.datetime_as_string(timestamp.to_datetime64(), unit=time_unit))
+        if isinstance(value, np.ndarray):
+            return [None if pd.api.types.is_scalar(v) and pd.isnull(v) else v for v in value.tolist()]
+        if isinstance(value, np.generic):
+            return value.item()
+        if value is pd.NA or value is pd.NaT:
+            return None
+        raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+    if orjson is not None:
+        # datetimes are passed through to `default` so they're formatted the same as timestamp columns
+        return lambda row: orjson.dumps(row, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+    return lambda row: json.dumps(row, default=default, separators=(",", ":")).encode()
@@ -35,13 +35,48 @@ class BaseFactory:
 
     @classmethod
     def get_subclass(cls, key: str):
-        if cls.import_path:
-            importlib.import_module(cls.import_path)
-        for c in cls.class_.__subclasses__():
-            if c.__name__ == key:
-                return c
-        raise NotImplementedError(
-            f"Could not find class named [{key}] in subclasses")
+        registry = cls.registry()
+        if key not in registry:
+            # classes defined since the registry was built, e.g. by plugins or tests
+            registry = cls.registry(refresh=True)
+        if key not in registry:
+            raise NotImplementedError(
+                f"Could not find class named [{key}] in subclasses")
+        return registry[key]
+
+    @classmethod
+    def registry(cls, refresh: bool = False) -> dict:
+        """Returns the subclasses of `class_`, including subclasses of subclasses, by name.
+
+        The registry is built once per factory so looking up a type doesn't depend on how many types there are.
+        """
+        if refresh or "_registry" not in cls.__dict__:
+            if cls.import_path:
+                importlib.import_module(cls.import_path)
+            registry = {}
+            pending = list(cls.class_.__subclasses__())
+            while pending:
+                c = pending.pop(0)
+                # the first class found with a name wins, so direct subclasses take precedence
+                registry.setdefault(c.__name__, c)
+                pending.extend(c.__subclasses__())
+            cls._registry = registry
+        return cls._registry
+
+    @classmethod
+    def field_plan(cls, c: type) -> list:
+        """Returns the fields, and how to convert them, that the positional parts of the concise syntax map onto.
+
+        The plan only depends on the class so it's worked out once per class.
+        """
+        if "_field_plans" not in cls.__dict__:
+            cls._field_plans = {}
+        if c not in cls._field_plans:
+            cls._field_plans[c] = [
+                (f.name, None if f.type == any else f.type) for f in dataclasses.fields(c)
+                if f.name not in cls.short_skip_fields and f.type != List[any]
+            ]
+        return cls._field_plans[c]
 
     @classmethod
     def parse_from_yaml(cls, yaml_str):
@@ -77,15 +112,8 @@ class BaseFactory:
 
         elif cls.short_key and conf.get(cls.short_key):
             parts = get_parts(conf.get(cls.short_key))
-            fields = [
-                f for f in dataclasses.fields(c)
-                if f.name not in cls.short_skip_fields and f.type != List[any]
-            ]
-            for f, conf_part in zip(fields, parts):
-                if f.type != any:
-                    conf[f.name] = f.type(conf_part.strip())
-                else:
-                    conf[f.name] = conf_part.strip()
+            for (name, convert), conf_part in zip(cls.field_plan(c), parts):
+                conf[name] = convert(conf_part.strip()) if convert else conf_part.strip()
 
             del conf[cls.short_key]
 
@@ -116,7 +144,7 @@ class ColumnFactory(BaseFactory):
     type_key: str = "column_type"
     short_key: str = "col"
     short_skip_fields: List[str] = [
-        "null_percentage", "id", "decimal_places", "output_type", "date_format"
+        "null_percentage", "null_mode", "id", "decimal_places", "output_type", "date_format"
     ]
     import_path: str | None = None
 
@@ -0,0 +1,112 @@
+#    Copyright 2022 @jack-tee
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Holds the columns of a table while they're generated, the frame for the targets is only built once at the end.
+
+Adding columns to a DataFrame one at a time means pandas keeps adding blocks and every so often consolidates, and
+copies, them, which gets slower the wider the table is. The store is a dict of columns that supports the parts of the
+DataFrame interface the columns use, e.g. `store[name]`, `store[name] = values`, `del store[name]`, `store.index` and
+`store.eval(...)`, so columns don't need to know which one they're adding to.
+"""
+
+import ast
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+
+class ColumnStore:
+    """The columns of a chunk of a table by name, along with the index they share."""
+
+    def __init__(self, data: Dict[str, pd.Series], index: pd.Index, attrs: dict = None):
+        self.data = data
+        self.index = index
+        self.attrs = attrs if attrs is not None else {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ColumnStore":
+        return cls({name: df[name] for name in df.columns}, df.index, dict(df.attrs))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.data)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __contains__(self, name) -> bool:
+        return name in self.data
+
+    def __getitem__(self, key) -> pd.Series | pd.DataFrame:
+        if isinstance(key, list):
+            return self.frame(key)
+        return self.data[key]
+
+    def __setitem__(self, name: str, value) -> None:
+        if isinstance(value, pd.Series):
+            # like a DataFrame the values are aligned on the index
+            value = value if value.index.equals(self.index) else value.reindex(self.index)
+            value = value.copy(deep=False)
+            value.name = name
+        else:
+            value = pd.Series(value, index=self.index, name=name)
+        self.data[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        del self.data[name]
+
+    def frame(self, names: List[str] = None) -> pd.DataFrame:
+        """Returns a frame of the `names` columns, defaults to all of them, that shares their data rather than copying it."""
+        names = self.columns if names is None else names
+        if not names:
+            return pd.DataFrame(index=self.index)
+        return pd.DataFrame({name: self.data[name] for name in names}, copy=False)
+
+    def eval(self, expression: str, engine: str = None, resolvers: tuple = (), inplace: bool = False):
+        """Evaluates `expression` as `DataFrame.eval` does, over a frame of only the columns it uses.
+
+        If `inplace` the columns the expression assigns to are added to the store.
+        """
+        names = used_names(expression)
+        df = self.frame(None if names is None else [name for name in self.data if name in names])
+        result = df.eval(expression, engine=engine, resolvers=resolvers, inplace=inplace)
+        if not inplace:
+            return result
+
+        assigned = assigned_names(expression)
+        for name in df.columns:
+            if assigned is None or name in assigned:
+                self[name] = df[name]
+
+
+def used_names(expression: str) -> set | None:
+    """Returns every name in `expression`, or None if it uses syntax only pandas understands, e.g. backticks."""
+    try:
+        tree = ast.parse(expression.strip())
+    except SyntaxError:
+        return None
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+
+def assigned_names(expression: str) -> set | None:
+    """Returns the names `expression` assigns to, e.g. `a` in `a = b + 1`, or None if they can't be worked out."""
+    try:
+        tree = ast.parse(expression.strip())
+    except SyntaxError:
+        return None
+    return {target.id for node in ast.walk(tree) if isinstance(node, ast.Assign)
+            for target in node.targets if isinstance(target, ast.Name)}
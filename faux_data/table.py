@@ -12,16 +12,21 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import copy
 import logging
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import List
+from typing import Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
 import yaml
 
-from .column import Column
+from .column import Column, EvalGroup, drop_columns, plan_columns
+from .dependencies import column_dependencies, column_releases, final_columns, needed_columns
+from .store import ColumnStore
 from .factory import ColumnFactory, TargetFactory
 from .target import Target
 from .utils import load_csv_with_types, normalise_path, GCS_PREFIX
@@ -30,6 +35,10 @@ pd.set_option("max_colwidth", 180)
 
 log = logging.getLogger(__name__)
 
+# tables without a `chunk_size:` are generated in chunks of this many rows, each chunk is seeded by its position so the
+# chunks, and so a seeded table's data, don't depend on how many workers there are
+DEFAULT_CHUNK_SIZE = 1_000_000
+
 
 @dataclass(kw_only=True)
 class Table:
@@ -39,6 +48,8 @@ class Table:
     columns: List[Column]
     targets: List[Target] = field(default_factory=list, repr=False)
     output_columns: List[str] = field(default_factory=list)
+    chunk_size: int | None = None
+    seed_sequence: np.random.SeedSequence = field(default=None, repr=False)
     df: pd.DataFrame = None
     complete: bool = False
     error: Exception = None
@@ -54,14 +65,30 @@ class Table:
                  columns: list,
                  template_dir: str = None,
                  output_columns: list = None,
-                 targets: list = None):
+                 targets: list = None,
+                 chunk_size: int = None,
+                 seed: int | np.random.SeedSequence = None):
         try:
             self.template_dir = template_dir
             self.name = name
             self.rows = rows
             self.columns = self.parse_cols(columns)
-            self.targets = self.parse_targets(targets)
             self.output_columns = output_columns if output_columns else None
+            initial = {"rowId"} if isinstance(rows, int) else None
+            # references are checked up front so a bad template fails before any data is generated
+            self.dependencies = column_dependencies(self.columns, initial)
+            self.steps = plan_columns(self.generated_columns(initial))
+            self.releases = self.plan_releases(initial)
+            self.targets = self.parse_targets(targets)
+            self.chunk_size = int(chunk_size) if chunk_size else None
+            if self.chunk_size is not None and self.chunk_size < 1:
+                raise Exception(f"chunk_size: must be a positive number of rows but was [{chunk_size}]")
+
+            if isinstance(seed, np.random.SeedSequence):
+                self.seed_sequence = seed
+            else:
+                # without a seed this draws fresh entropy so every run is different
+                self.seed_sequence = np.random.SeedSequence(seed)
 
         except Exception as e:
             self.complete = False
@@ -75,6 +102,26 @@ class Table:
 
         return cols
 
+    def generated_columns(self, initial: set | None) -> list:
+        """Returns the columns that need to be generated, those the `output_columns` don't use are skipped."""
+        if not self.output_columns:
+            return self.columns
+
+        needed = needed_columns(self.columns, self.dependencies, self.output_columns, initial)
+        skipped = [col.name for i, col in enumerate(self.columns) if i not in needed]
+        if skipped:
+            log.debug(f"table [{self.name}] skipping columns {skipped} which aren't used by the output_columns")
+        return [col for i, col in enumerate(self.columns) if i in needed]
+
+    def plan_releases(self, initial: set | None) -> list:
+        """Returns the columns to remove after each step, the columns that aren't output are removed once nothing else reads them."""
+        positions = {id(col): i for i, col in enumerate(self.columns)}
+        steps = [[positions[id(col)] for col in (step.columns if isinstance(step, EvalGroup) else [step])]
+                 for step in self.steps]
+
+        keep = set(self.output_columns or final_columns(self.columns, initial))
+        return column_releases(self.columns, self.dependencies, steps, keep)
+
     def parse_targets(self, targets) -> list:
         targs = []
 
@@ -90,9 +137,13 @@ class Table:
 
         return targs
 
-    def create_df(self) -> pd.DataFrame:
+    def create_df(self, start: int = 0, stop: int = None) -> pd.DataFrame:
+        """Creates the initial frame for the rows in the range `start` to `stop`, defaults to all rows."""
         if isinstance(self.rows, int):
-            return pd.DataFrame({"rowId": np.arange(self.rows)})
+            stop = self.rows if stop is None else stop
+            df = pd.DataFrame({"rowId": np.arange(start, stop)})
+            df.attrs["row_offset"] = start
+            return df
         else:
 
             if self.rows.startswith("/") or self.rows.startswith(GCS_PREFIX):
@@ -109,12 +160,11 @@ class Table:
             log.debug(f"loading csv from {filepath}")
             return load_csv_with_types(filepath)
 
-    def generate(self) -> None:
-        """Generates the table data"""
+    def generate(self, workers: int = None) -> None:
+        """Generates the table data, if `workers` is more than 1 chunks of the table are generated in parallel processes."""
         try:
-            self.df = self.create_df()
-            for column in self.columns:
-                column.maybe_add_column(self.df)
+            batches = list(self._generate_batches(workers))
+            self.df = batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
 
         except Exception as e:
             self.complete = False
@@ -124,12 +174,130 @@ class Table:
             raise self.error
 
         else:
-            self.df.drop(columns="rowId", inplace=True)
+            self.complete = True
 
-            if self.output_columns:
-                self.df = self.df[self.output_columns]
+    def generate_batch(self, df: pd.DataFrame, batch: int, threads: bool = True) -> pd.DataFrame:
+        """Adds every column to `df`, a frame created by `create_df`, and returns the output columns.
 
-            self.complete = True
+        `batch` is the index of the chunk being generated, each chunk seeds the columns with independent random streams
+        derived from the table's seed, so the output only depends on the seed and the chunk, not on where or in what
+        order the chunks are generated.
+
+        If `threads` the columns that don't depend on any others are generated in a pool of threads while the rest
+        are added in order, most of the work is in numpy which releases the GIL.
+
+        The columns are held in a `ColumnStore` while they're generated and the returned frame is built from it once.
+        """
+        self.seed_columns(batch)
+        df = ColumnStore.from_frame(df)
+
+        independent = deque(step for step in self.steps if step.is_independent()) if threads else deque()
+        workers = min(len(independent), os.cpu_count() or 1)
+        # there's only a benefit to threads if there's more than one column to generate at the same time
+        executor = ThreadPoolExecutor(max_workers=workers) if len(independent) > 1 else None
+        pending = {}
+        try:
+            # columns are still added to the frame in order, only the values of independent ones are generated ahead of
+            # time, and only as many as there are threads so that the columns waiting to be added don't pile up
+            for step, release in zip(self.steps, self.releases):
+                while executor and independent and len(pending) < workers:
+                    ahead = independent.popleft()
+                    pending[id(ahead)] = executor.submit(ahead.generate_column, len(df))
+
+                if id(step) in pending:
+                    df[step.name] = pending.pop(id(step)).result()
+                else:
+                    step.maybe_add_column(df)
+
+                # free the columns nothing else reads as soon as possible so memory tracks what's still needed
+                drop_columns(df, release)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        if self.output_columns:
+            return df.frame(self.output_columns)
+        return df.frame([name for name in df.columns if name != "rowId"])
+
+    def iter_batches(self, workers: int = None) -> Iterator[pd.DataFrame]:
+        """Generates the table data in chunks of `chunk_size` rows, yielding each chunk as it's completed.
+
+        Only one chunk is held in memory at a time. If `chunk_size` isn't set the chunks are `DEFAULT_CHUNK_SIZE` rows.
+        If `workers` is more than 1 the chunks are generated in a pool of processes and yielded in order.
+        """
+        try:
+            yield from self._generate_batches(workers)
+
+        except Exception as e:
+            self.complete = False
+            self.error = TableGenerationException(
+                f"Error on table [{self.name}]. {e}")
+
+            raise self.error
+
+    def seed_columns(self, batch: int) -> None:
+        """Seeds every column with a random stream specific to this table, chunk and column."""
+        batch_seed = np.random.SeedSequence(self.seed_sequence.entropy,
+                                            spawn_key=(*self.seed_sequence.spawn_key, batch))
+
+        for column, column_seed in zip(self.columns, batch_seed.spawn(len(self.columns))):
+            column.seed(column_seed)
+
+    @staticmethod
+    def is_parallel(workers: int | None) -> bool:
+        return workers is not None and workers > 1
+
+    def load_source(self) -> Tuple[pd.DataFrame | None, int]:
+        """Returns the frame the table is based on, if `rows:` is a file, along with the total number of rows."""
+        if isinstance(self.rows, int):
+            return None, self.rows
+        else:
+            # rows come from a file so load it once and split it up
+            source = self.create_df()
+            return source, len(source)
+
+    def slice_source(self, source: pd.DataFrame | None, start: int, stop: int) -> pd.DataFrame:
+        """Creates the initial frame for a chunk of rows."""
+        if source is None:
+            return self.create_df(start, stop)
+        else:
+            df = source.iloc[start:stop].reset_index(drop=True)
+            df.attrs["row_offset"] = start
+            return df
+
+    def _generate_batches(self, workers: int = None) -> Iterator[pd.DataFrame]:
+        source, total_rows = self.load_source()
+
+        chunk_size = self.chunk_size or DEFAULT_CHUNK_SIZE
+
+        # always produce at least one, possibly empty, chunk
+        ranges = [(start, min(start + chunk_size, total_rows))
+                  for start in range(0, max(total_rows, 1), max(chunk_size, 1))]
+
+        if self.is_parallel(workers):
+            yield from self._generate_batches_in_parallel(source, ranges, workers)
+        else:
+            for batch, (start, stop) in enumerate(ranges):
+                yield self.generate_batch(self.slice_source(source, start, stop), batch)
+
+    def _generate_batches_in_parallel(self, source, ranges, workers) -> Iterator[pd.DataFrame]:
+        # the workers only need the column definitions, not the targets or any previous output
+        table = copy.copy(self)
+        table.targets = []
+        table.df = None
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(table, source)) as executor:
+            # limit how many chunks are in flight so that memory stays bounded when the targets are slower than generation
+            pending = deque()
+            for batch, (start, stop) in enumerate(ranges):
+                pending.append(executor.submit(_generate_batch_in_worker, batch, start, stop))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
 
     def load(self):
         """Loads `self.df` to the specified targets"""
@@ -147,14 +315,66 @@ class Table:
 
             raise self.error
 
-    def run(self):
-        self.generate()
-        self.load()
+    def load_batches(self, workers: int = None):
+        """Generates the table a chunk at a time, loading each chunk to the specified targets before generating the next."""
+        if not self.targets:
+            print("No targets!")
+
+        try:
+            saved = False
+            try:
+                for batch, df in enumerate(self.iter_batches(workers)):
+                    self.df = df
+                    for target in self.targets:
+                        target.save_batch(self, batch)
+                saved = True
+
+            finally:
+                # the targets' files are closed even if a chunk fails to generate or save
+                for target in self.targets:
+                    if saved:
+                        target.close_batches(self)
+                    else:
+                        target.abort_batches(self)
+
+        except TableGenerationException:
+            raise
+
+        except Exception as e:
+            self.complete = False
+            self.error = TableLoadingException(
+                f"Error on table [{self.name}]. {e}")
+
+            raise self.error
+
+        else:
+            self.complete = True
+
+    def run(self, workers: int = None):
+        if self.chunk_size or self.is_parallel(workers):
+            self.load_batches(workers)
+        else:
+            self.generate()
+            self.load()
 
     def result(self):
         return "yope"
 
 
+_worker_state = {}
+
+
+def _init_worker(table: Table, source: pd.DataFrame | None) -> None:
+    _worker_state.update(table=table, source=source)
+
+
+def _generate_batch_in_worker(batch: int, start: int, stop: int) -> pd.DataFrame:
+    """Generates a single chunk of the table within a worker process."""
+    table = _worker_state["table"]
+    # the worker processes already use every core so there's no benefit to threads as well
+    return table.generate_batch(table.slice_source(_worker_state["source"], start, stop), batch, threads=False)
+
+
 class TableParsingException(Exception):
     pass
 
@@ -20,9 +20,14 @@ from abc import abstractmethod
 from dataclasses import dataclass, field
 from typing import Optional, Tuple
 
+import fsspec
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
+from .arrays import to_arrow_table
 from .config import settings
+from .encoding import to_json_lines
 
 
 @dataclass(kw_only=True)
@@ -35,6 +40,19 @@ class Target(abc.ABC):
     def save(self, tbl):
         pass
 
+    def save_batch(self, tbl, batch: int):
+        """Saves one chunk of a table generated with `chunk_size:`, `batch` is the index of the chunk.
+        By default each chunk is saved as if it were the whole table."""
+        self.save(tbl)
+
+    def close_batches(self, tbl):
+        """Called once every chunk of a table has been saved."""
+        pass
+
+    def abort_batches(self, tbl):
+        """Called instead of `close_batches` if generating or saving a chunk fails."""
+        pass
+
 
 @dataclass(kw_only=True)
 class PartitionedFileTarget(Target):
@@ -42,6 +60,7 @@ class PartitionedFileTarget(Target):
 
     filetype: str
     partition_cols: list[str] = field(default_factory=list)
+    writers = None
 
     @abstractmethod
     def construct_path(self, partition_path=None) -> str:
@@ -50,9 +69,10 @@ class PartitionedFileTarget(Target):
     def pre_save_object(self, path):
         pass
 
-    def save(self, tbl):
+    def partitions(self, df: pd.DataFrame):
+        """Splits `df` by `partition_cols`, yielding each partition along with the path it should be saved to."""
         if self.partition_cols:
-            partitions = tbl.df.groupby(self.partition_cols)
+            partitions = df.groupby(self.partition_cols, observed=True)
             for partition in partitions:
 
                 if len(self.partition_cols) == 1:
@@ -64,12 +84,36 @@ class PartitionedFileTarget(Target):
 
                 path = self.construct_path(partition_path)
 
-                df = partition[1].drop(self.partition_cols, axis=1)
-                self.save_object(df, path)
+                yield partition[1].drop(self.partition_cols, axis=1), path
 
         else:
-            path = self.construct_path()
-            self.save_object(tbl.df, path)
+            yield df, self.construct_path()
+
+    def save(self, tbl):
+        for df, path in self.partitions(tbl.df):
+            self.save_object(df, path)
+
+    def save_batch(self, tbl, batch: int):
+        """Appends a chunk to the target's files, the files are kept open until `close_batches` is called."""
+        if batch == 0:
+            self.writers = {}
+
+        for df, path in self.partitions(tbl.df):
+            if path not in self.writers:
+                self.pre_save_object(path)
+                logging.debug(f"opening {path} for writing")
+                self.writers[path] = BatchWriter(path, self.filetype, arrow_types(tbl))
+
+            self.writers[path].write(df)
+
+    def close_batches(self, tbl):
+        for writer in (self.writers or {}).values():
+            writer.close()
+        self.writers = {}
+
+    def abort_batches(self, tbl):
+        # the chunks saved so far are left in the files, but the files are closed
+        self.close_batches(tbl)
 
     def save_object(self, df, path):
 
@@ -80,11 +124,68 @@ class PartitionedFileTarget(Target):
             case 'csv':
                 df.to_csv(path, index=False)
             case 'parquet':
-                df.to_parquet(path, index=False)
+                with fsspec.open(path, "wb") as file:
+                    pq.write_table(to_arrow_table(df), file)
             case _:
                 raise Exception(f"unrecognised filetype: [{self.filetype}]")
 
 
+class BatchWriter:
+    """Writes successive chunks of a table to a single csv or parquet file."""
+
+    def __init__(self, path: str, filetype: str, types: dict = None):
+        if filetype not in ('csv', 'parquet'):
+            raise Exception(f"unrecognised filetype: [{filetype}]")
+
+        self.filetype = filetype
+        self.types = types or {}
+        self.file = fsspec.open(path, "wb").open()
+        self.parquet_writer = None
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        match self.filetype:
+            case 'csv':
+                self.file.write(df.to_csv(index=False, header=self.header).encode("utf-8"))
+                self.header = False
+            case 'parquet':
+                if self.parquet_writer is None:
+                    table = to_arrow_table(df)
+                    schema = self.typed_nulls(table.schema)
+                    if schema != table.schema:
+                        table = to_arrow_table(df, schema=schema)
+                    self.parquet_writer = pq.ParquetWriter(self.file, table.schema)
+                else:
+                    # later chunks are coerced to the schema of the first
+                    table = to_arrow_table(df, schema=self.parquet_writer.schema)
+                self.parquet_writer.write_table(table)
+
+    def typed_nulls(self, schema: pa.Schema) -> pa.Schema:
+        """Replaces the null type of fields that are all null in the first chunk with the type of their column, the
+        schema is fixed by the first chunk so the field could never hold the values of later chunks otherwise."""
+        for i, arrow_field in enumerate(schema):
+            if pa.types.is_null(arrow_field.type) and arrow_field.name in self.types:
+                schema = schema.set(i, pa.field(arrow_field.name, self.types[arrow_field.name]))
+        return schema
+
+    def close(self) -> None:
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        self.file.close()
+
+
+arrow_type_mapping = {
+    "Date": pa.date32(),
+}
+
+
+def arrow_types(tbl) -> dict:
+    """The Arrow types of `tbl`'s columns that pandas holds as python objects, so can't be told from a chunk that is
+    all null, e.g. Dates."""
+    return {col.name: arrow_type_mapping[col.data_type] for col in tbl.columns
+            if col.output_type is None and col.data_type in arrow_type_mapping}
+
+
 @dataclass(kw_only=True)
 class CloudStorage(PartitionedFileTarget, Target):
     """
@@ -176,6 +277,18 @@ class LocalFile(PartitionedFileTarget, Target):
 
 
 
+# BigQuery types for the values held in dictionary encoded columns
+categorical_sql_types = {
+    "string": "STRING",
+    "decimal": "NUMERIC",
+    "date": "DATE",
+    "boolean": "BOOL",
+    "integer": "INT64",
+    "floating": "FLOAT64",
+    "datetime64": "DATETIME",
+}
+
+
 @dataclass(kw_only=True)
 class BigQuery(Target):
     """
@@ -203,6 +316,7 @@ class BigQuery(Target):
     post_generation_sql: str | None = None
     client = None
     bigquery = None
+    last_result = None
 
     def setup(self):
         """Setup the BQ client for the target."""
@@ -233,23 +347,43 @@ class BigQuery(Target):
 
     def get_bq_schema_fields(self, tbl):
         """Generate a schema just for the fields that cannot have their types inferred from pandas types.
-        In this case it's just the Timestamp type that by default is loaded as a Datetime"""
+        That's the Timestamp type that by default is loaded as a Datetime, and dictionary encoded (Categorical) columns
+        which are typed by their values."""
         schema = []
         for col in tbl.columns:
             if col.data_type == "Timestamp" and col.output_type is None:
                 schema.append(self.bigquery.SchemaField(col.name, self.bigquery.enums.SqlTypeNames.TIMESTAMP))
+
+        if tbl.df is not None:
+            for name, dtype in tbl.df.dtypes.items():
+                if isinstance(dtype, pd.CategoricalDtype) and name not in {field.name for field in schema}:
+                    sql_type = categorical_sql_types.get(pd.api.types.infer_dtype(dtype.categories))
+                    if sql_type:
+                        schema.append(self.bigquery.SchemaField(name, sql_type))
         return schema
 
 
     def save(self, tbl):
         """The save method is called when this target is executed."""
+        result = self.load_df(tbl, self.truncate)
+        self.maybe_run_post_generation_sql(result)
+
+    def save_batch(self, tbl, batch: int):
+        """Loads a chunk of the table, only the first chunk truncates the table, the rest are appended."""
+        self.last_result = self.load_df(tbl, self.truncate and batch == 0)
+
+    def close_batches(self, tbl):
+        self.maybe_run_post_generation_sql(self.last_result)
+
+    def load_df(self, tbl, truncate: bool):
+        """Loads `tbl.df` to the BigQuery table."""
         self.setup()
 
         dataset_id = f"{self.project}.{self.dataset}"
         schema_table = f"{self.project}.{self.dataset}.{self.table}"
         dataset = self.get_or_create_dataset(dataset_id)
 
-        write_disposition = self.bigquery.WriteDisposition.WRITE_TRUNCATE if self.truncate else self.bigquery.WriteDisposition.WRITE_APPEND
+        write_disposition = self.bigquery.WriteDisposition.WRITE_TRUNCATE if truncate else self.bigquery.WriteDisposition.WRITE_APPEND
 
         schema = self.get_bq_schema_fields(tbl)
 
@@ -262,13 +396,15 @@ class BigQuery(Target):
         result = self.client.load_table_from_dataframe(
             tbl.df, schema_table, job_config=job_config).result()
 
-        if self.post_generation_sql and result.state == "DONE":
-            self.client.query(self.post_generation_sql.format(t=self),
-                              project=self.project).result()
-
         logging.info(
             f"Result: {result.state} {result.output_rows} rows written to {result.destination}"
         )
+        return result
+
+    def maybe_run_post_generation_sql(self, result):
+        if self.post_generation_sql and result is not None and result.state == "DONE":
+            self.client.query(self.post_generation_sql.format(t=self),
+                              project=self.project).result()
 
 
 @dataclass(kw_only=True)
@@ -344,7 +480,7 @@ class Pubsub(StreamingTarget, Target):
             self.client = pubsub_v1.PublisherClient()
 
     def process_row(self, row, row_attrs):
-        return self.client.publish(self.topic_path, row.encode(), **row_attrs, **self.attributes)
+        return self.client.publish(self.topic_path, row, **row_attrs, **self.attributes)
 
     def process_df(self, df) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
         if self.attribute_cols:
@@ -366,11 +502,7 @@ class Pubsub(StreamingTarget, Target):
 
         data_df, attributes_df = self.process_df(tbl.df)
 
-        json_data = data_df.to_json(
-            orient='records',
-            lines=True,
-            date_format=self.date_format,
-            date_unit=self.time_unit).strip().split("\n")
+        json_data = to_json_lines(data_df, date_format=self.date_format, time_unit=self.time_unit)
 
         for i, row in enumerate(json_data):
 
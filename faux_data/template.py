@@ -18,15 +18,16 @@ import base64
 import logging
 import os
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 import yaml
 
-from .config import settings
-from .table import Table
 from .template_rendering import render_template
 from .utils import split_gcs_path, GCS_PREFIX
 
+if TYPE_CHECKING:
+    from .table import Table
+
 log = logging.getLogger(__name__)
 
 
@@ -35,16 +36,28 @@ class Template:
     template_path: str | None = None
     variables: dict = field(default_factory=dict, repr=False)
     tables: List[Table]
+    seed: int | None = None
     params: dict = field(default_factory=dict, init=False, repr=False)
 
     def __init__(self,
                  tables: dict,
                  template_path: str = None,
-                 variables: dict = None):
+                 variables: dict = None,
+                 seed: int = None):
+        # pandas and numpy are only needed once there are tables to generate, rendering a template doesn't load them
+        import numpy as np
+
+        from .table import Table
+
         self.template_path = template_path
         self.variables = variables
+        self.seed = seed
+
+        # each table gets an independent random stream, a `seed:` on a table overrides the template's seed
+        table_seeds = np.random.SeedSequence(seed).spawn(len(tables))
         self.tables = [
-            Table(template_dir=self.dirname, **table) for table in tables
+            Table(template_dir=self.dirname, **{"seed": table_seed, **table})
+            for table, table_seed in zip(tables, table_seeds)
         ]
 
     @property
@@ -52,13 +65,13 @@ class Template:
         return os.path.dirname(
             self.template_path) if self.template_path else None
 
-    def generate(self):
+    def generate(self, workers: int = None):
         for table in self.tables:
-            table.generate()
+            table.generate(workers)
 
-    def run(self):
+    def run(self, workers: int = None):
         for table in self.tables:
-            table.run()
+            table.run(workers)
 
     def result(self):
         return '/n'.join(t.result() for t in self.tables)
@@ -83,6 +96,8 @@ class Template:
 
     @classmethod
     def from_file(cls, filepath, params={}):
+        from .config import settings
+
         log.info(
             f"instantiating Template from file: [{filepath}] with params: [{params}]"
         )
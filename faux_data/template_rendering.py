@@ -18,8 +18,8 @@ import re
 from datetime import datetime, timedelta
 from typing import List, Tuple
 
-import dateutil
-import pandas as pd
+import dateutil.parser
+import dateutil.tz
 import yaml
 from jinja2 import BaseLoader, Environment
 from jinja2.exceptions import UndefinedError
@@ -135,6 +135,8 @@ def parse_input_ts(ts):
             res = dateutil.parser.isoparse(ts)
         except Exception as e:
             try:
+                # only offsets need pandas, so rendering with dates or the defaults doesn't import it
+                import pandas as pd
                 res = pd.Timedelta(ts)
             except Exception as e2:
                 raise TemplateRenderException(
@@ -187,7 +189,7 @@ def resolve_time_period(start, end):
         if isinstance(end, datetime):
             return end - period, end
 
-        elif isinstance(end, pd._libs.tslibs.timedeltas.Timedelta):
+        elif isinstance(end, timedelta):
 
             if end.total_seconds() >= 0:
                 # end is a positive delta
@@ -203,7 +205,7 @@ def resolve_time_period(start, end):
         if isinstance(start, datetime):
             return start, start + period
 
-        elif isinstance(start, pd._libs.tslibs.timedeltas.Timedelta):
+        elif isinstance(start, timedelta):
 
             if start.total_seconds() >= 0:
                 # start is a positive delta
@@ -220,16 +222,16 @@ def resolve_time_period(start, end):
         if isinstance(start, datetime) and isinstance(end, datetime):
             return start, end
 
-        elif isinstance(start, pd._libs.tslibs.timedeltas.Timedelta) \
-            and isinstance(end, pd._libs.tslibs.timedeltas.Timedelta):
+        elif isinstance(start, timedelta) \
+            and isinstance(end, timedelta):
             return now + start, now + end
 
         elif isinstance(start, datetime) \
-            and isinstance(end, pd._libs.tslibs.timedeltas.Timedelta):
+            and isinstance(end, timedelta):
 
             return start, start + end
 
-        elif isinstance(start, pd._libs.tslibs.timedeltas.Timedelta) \
+        elif isinstance(start, timedelta) \
             and isinstance(end, datetime):
 
             return end + start, end
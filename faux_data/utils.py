@@ -14,12 +14,11 @@
 
 import os
 import re
-from decimal import Decimal
-
-import pandas as pd
 
 GCS_PREFIX = "gs://"
 
+PARTS_PATTERN = re.compile(r"[ ]?(?:(?!\"|')(\S+)|(?:\"|')(.+?)(?:\"|'))[ ]?")
+
 def get_parts(val: str):
     """Splits a string into parts respecting double and single quotes
 
@@ -28,8 +27,7 @@ def get_parts(val: str):
         ["mycol", "Random", "Timestamp", "2023-03-03 00:00:00", "2026-12-12 23:59:59"]
 
     """
-    groups = re.findall(r"[ ]?(?:(?!\"|')(\S+)|(?:\"|')(.+?)(?:\"|'))[ ]?",
-                        val)
+    groups = PARTS_PATTERN.findall(val)
 
     # there are two matching groups for the two cases so get the first non empty val
     def first_non_empty(g):
@@ -63,13 +61,21 @@ def extract_precision_and_scale(type_: str) -> tuple[int, int]:
     return int(re_match.group("precision")), int(re_match.group("scale"))
 
 
-def load_csv_with_types(path: str) -> pd.DataFrame:
+def load_csv_with_types(path: str) -> "pd.DataFrame":
     """Loads a csv from a file if column names are of the form column_name[type]
     then it converts the column to that type."""
 
     header_with_type_pattern = r"^(\w+)\[([A-z0-9(),]+)\]$"
 
-    df = pd.read_csv(path)
+    import pandas as pd
+
+    from .arrays import to_decimal
+
+    # decimal columns are read as text so that they're parsed exactly rather than via floats
+    header = pd.read_csv(path, nrows=0).columns
+    decimal_columns = {name: "string" for name in header if re.match(r"^\w+\[Decimal", name)}
+
+    df = pd.read_csv(path, dtype=decimal_columns)
     for column_name in df.columns:
 
         re_match = re.match(header_with_type_pattern, column_name)
@@ -92,13 +98,9 @@ def load_csv_with_types(path: str) -> pd.DataFrame:
                 case 'Float':
                     df[clean_column_name] = df[clean_column_name].astype('float64')
                 case _ as t if t.startswith('Decimal'): # needs to be able to handle scale and precision
-                    _, scale = extract_precision_and_scale(t)
+                    precision, scale = extract_precision_and_scale(t)
 
-                    df[clean_column_name] = df[clean_column_name][df[clean_column_name].notnull()] \
-                                    .round(decimals=scale) \
-                                    .astype("string") \
-                                    .apply(lambda v: Decimal(v)) \
-                                    .astype("object")
+                    df[clean_column_name] = to_decimal(df[clean_column_name], scale, precision)
                 case _:
                     raise Exception(f"type [{type_}] not recognised, expected one of String, Int, Float, Timestamp, Date or Decimal(X,X)")
 
@@ -1,7 +1,10 @@
+import os
+import subprocess
+import sys
 import unittest
 
 import pytest
-from faux_data.cmd import parse_params
+from faux_data.cmd import get_workers, parse_params
 
 simple_tests = [
     ("--start 2021-03-02", {
@@ -60,3 +63,39 @@ def test_cmd_parse_basic(cli_str, expected_params):
     params = parse_params(cli_args)
 
     assert expected_params == params
+
+
+@pytest.mark.parametrize("params,expected_workers", [
+    ({}, None),
+    ({"workers": "4"}, 4),
+    ({"workers": True}, os.cpu_count()),
+])
+def test_cmd_get_workers(params, expected_workers):
+    params["other"] = "foo"
+
+    assert get_workers(params) == expected_workers
+    # workers isn't a template variable so shouldn't be left in the params
+    assert params == {"other": "foo"}
+
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+
+@pytest.mark.parametrize("args", [
+    ["--help"],
+    ["version"],
+    ["render", os.path.join(TEMPLATES_DIR, "Eval.yaml")],
+])
+def test_cmd_fast_start(args):
+    """The commands that don't generate data shouldn't import the data libraries, they dominate start up time."""
+    script = (
+        "import sys\n"
+        "from faux_data.cmd import cmd\n"
+        f"cmd(['faux', *{args!r}])\n"
+        "heavy = ('pandas', 'numpy', 'pyarrow', 'google.cloud', 'dynaconf', 'fsspec')\n"
+        "print(sorted(m for m in heavy if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(TEMPLATES_DIR))
+
+    assert result.stdout.splitlines()[-1] == "[]"
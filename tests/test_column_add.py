@@ -1,7 +1,9 @@
 import unittest
+from decimal import Decimal
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import pytest
 from faux_data import column
 from faux_data.table import Table
@@ -71,6 +73,247 @@ class TestOutputTypes(unittest.TestCase):
         assert all(tbl.df["tcol"].str.fullmatch(r"\d{4}-\d{2}-01"))
 
 
+class TestDictionaryEncodedColumns(unittest.TestCase):
+
+    def test_low_cardinality_strings_stay_dictionary_encoded(self):
+        """Tests that String Selection and MapValues columns are held as Categoricals, nulls included."""
+
+        conf = """
+        name: mytbl
+        rows: 50
+        columns:
+          - col: currency Selection String
+            null_percentage: 20
+            values:
+              - EUR
+              - GBP
+          - name: symbol
+            column_type: MapValues
+            source_column: currency
+            default: "?"
+            values:
+              EUR: €
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["currency"].dtype == 'category'
+        assert set(tbl.df["currency"].cat.categories) == {"EUR", "GBP"}
+        assert tbl.df["currency"].isnull().sum() == 10
+        assert tbl.df["symbol"].dtype == 'category'
+        assert all(tbl.df["symbol"][tbl.df["currency"] == "EUR"] == "€")
+        assert all(tbl.df["symbol"][tbl.df["currency"] != "EUR"] == "?")
+
+    def test_map_values_of_a_plain_column(self):
+        """Tests MapValues on a column that isn't dictionary encoded, unmapped values are null without a default."""
+
+        conf = """
+        name: mytbl
+        rows: 6
+        columns:
+          - col: num Series
+            values: [1, 2, 3]
+          - name: mapped
+            column_type: MapValues
+            source_column: num
+            values:
+              1: 10
+              2: 20
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert list(tbl.df["mapped"].fillna(-1)) == [10, 20, -1, 10, 20, -1]
+
+    def test_map_values_of_a_subset_of_strings(self):
+        """Tests that string values missing from the mapping are null without a default."""
+
+        conf = """
+        name: mytbl
+        rows: 6
+        columns:
+          - col: currency Series String
+            values: [EUR, USD, GBP]
+          - name: symbol
+            column_type: MapValues
+            source_column: currency
+            data_type: String
+            values:
+              EUR: €
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert list(tbl.df["symbol"].astype(object).fillna("null")) == ["€", "null", "null"] * 2
+
+    def test_map_values_chunks_have_the_same_categories(self):
+        """Tests that every chunk of a MapValues column has the same categories, even chunks where nothing maps."""
+
+        conf = """
+        name: mytbl
+        rows: 8
+        chunk_size: 2
+        columns:
+          - col: num Sequential Int 0 1
+          - name: word
+            column_type: MapValues
+            source_column: num
+            values:
+              0: zero
+              5: five
+          - name: flag
+            column_type: MapValues
+            source_column: num
+            data_type: Bool
+            values:
+              1: true
+        """
+        tbl = Table.parse_from_yaml(conf)
+        batches = list(tbl.iter_batches())
+
+        for batch in batches:
+            assert list(batch["word"].cat.categories) == ["zero", "five"]
+            assert batch["flag"].dtype == 'boolean'
+        assert list(pd.concat(batches)["word"].astype(object).fillna("null")) == \
+            ["zero", "null", "null", "null", "null", "five", "null", "null"]
+
+    def test_dictionary_encoded_columns_decoded_for_eval_and_numeric_types(self):
+        """Tests that numeric conversions and Eval expressions see the values rather than the categories."""
+
+        conf = """
+        name: mytbl
+        rows: 5
+        columns:
+          - col: num Fixed Int '7'
+          - col: word Series
+            values:
+              - a
+              - b
+          - name: after_a
+            column_type: Eval
+            expression: word > "a"
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["num"].cat.categories.dtype == 'Int64'
+        assert list(tbl.df["after_a"]) == [False, True, False, True, False]
+
+    def test_only_fixed_and_empty_columns_stay_encoded_when_converted(self):
+        """Tests that a column that happens to have a single value is converted like any other column."""
+
+        conf = """
+        name: mytbl
+        rows: 4
+        columns:
+          - col: fixed Fixed String '2021-01-01'
+            output_type: Timestamp
+          - col: single Selection String
+            output_type: Timestamp
+            values:
+              - '2021-01-01'
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["fixed"].dtype == 'category'
+        assert tbl.df["single"].dtype == 'datetime64[ns]'
+
+
+class TestNullInjection(unittest.TestCase):
+
+    def test_nulls_keep_int_and_bool_types(self):
+        """Tests that null_percentage doesn't upcast Int and Bool columns to float or object."""
+
+        conf = """
+        name: mytbl
+        rows: 20
+        columns:
+          - col: ints Series
+            null_percentage: 25
+            values: [1, 2, 3]
+          - col: flags Random Bool
+            null_percentage: 50
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["ints"].dtype == 'Int64'
+        assert tbl.df["ints"].isnull().sum() == 5
+        assert tbl.df["flags"].dtype == 'boolean'
+        assert tbl.df["flags"].isnull().sum() == 10
+
+    def test_exact_null_mode_counts(self):
+        """Tests that null_mode: exact nulls exactly null_percentage of the rows, including none and all of them."""
+
+        for null_percentage, nulls in [(0, 0), (1, 1), (33, 33), (50, 50), (100, 100)]:
+            col = column.Random(name="ints", column_type="Random", data_type="Int", min=1, max=5,
+                                null_percentage=null_percentage)
+            col.seed(np.random.SeedSequence(1))
+
+            assert col.null_mask(100).sum() == nulls
+
+    def test_bernoulli_null_mode(self):
+        """Tests that null_mode: bernoulli nulls each row independently."""
+
+        conf = """
+        name: mytbl
+        rows: 10000
+        seed: 1
+        columns:
+          - col: ints Random Int 1 5
+            null_percentage: 10
+            null_mode: bernoulli
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        nulls = tbl.df["ints"].isnull().sum()
+        assert 800 < nulls < 1200
+        assert nulls != 1000
+
+    def test_invalid_null_mode(self):
+        conf = """
+        name: mytbl
+        rows: 10
+        columns:
+          - col: ints Random Int 1 5
+            null_percentage: 10
+            null_mode: sometimes
+        """
+        tbl = Table.parse_from_yaml(conf)
+        with pytest.raises(Exception) as e:
+            tbl.generate()
+
+        assert "null_mode" in e.__repr__()
+
+
+class TestDecimalColumns(unittest.TestCase):
+
+    def test_decimals_are_fixed_precision(self):
+        """Tests that Decimal columns are decimal128 arrays rounded to decimal_places, nulls included."""
+
+        conf = """
+        name: mytbl
+        rows: 10
+        columns:
+          - col: price Sequential Decimal -1.005 0.5
+            decimal_places: 2
+            null_percentage: 20
+          - col: fixed Fixed Decimal 4.56
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert str(tbl.df["price"].dtype) == "decimal128(38, 2)"
+        assert tbl.df["price"].isnull().sum() == 2
+        assert set(tbl.df["price"].dropna()) <= {Decimal("-1.00"), Decimal("-0.50"), Decimal("0.00"), Decimal("0.50"),
+                                                 Decimal("1.00"), Decimal("1.50"), Decimal("2.00"), Decimal("2.50"),
+                                                 Decimal("3.00"), Decimal("3.50")}
+        assert all(tbl.df["fixed"] == Decimal("4.5600"))
+        assert pa.Table.from_pandas(tbl.df).schema.field("fixed").type == pa.decimal128(38, 4)
+
+
 class TestMapColumnGeneration(unittest.TestCase):
 
     def test_basic_map_column(self):
@@ -155,6 +398,49 @@ class TestMapColumnGeneration(unittest.TestCase):
         assert tbl.df["map_col"][0] == """{"col1":"boo","col2":5,"col3":5.6}"""
         assert tbl.df["map_col"].dtype == "string"
 
+    def test_map_column_with_json_timestamps_are_epoch_millis(self):
+        conf = """
+        name: mytbl
+        rows: 2
+        columns:
+          - col: map_col Map
+            data_type: String
+            columns:
+              - col: ts Sequential Timestamp "2022-01-01 00:00:00" 1S
+              - col: dt Fixed Timestamp 2022-01-01
+                null_percentage: 100
+
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert list(tbl.df["map_col"]) == ["""{"ts":1640995200000,"dt":null}""", """{"ts":1640995201000,"dt":null}"""]
+
+    def test_nested_map_column_is_a_struct(self):
+        """Tests that Maps are built as Arrow structs, with nested Maps as nested structs."""
+        conf = """
+        name: mytbl
+        rows: 5
+        columns:
+          - col: outer Map
+            columns:
+              - col: id Sequential Int 1 1
+              - col: inner Map
+                columns:
+                  - col: code Fixed String abc
+                  - col: price Fixed Decimal 2.5
+                    decimal_places: 2
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert list(tbl.df.columns) == ["outer"]
+        assert tbl.df["outer"][1] == {"id": 2, "inner": {"code": "abc", "price": Decimal("2.50")}}
+
+        struct_type = pa.Table.from_pandas(tbl.df).schema.field("outer").type
+        assert pa.types.is_struct(struct_type)
+        assert struct_type["inner"].type["price"].type == pa.decimal128(38, 2)
+
 
 class TestArrayColumnGeneration(unittest.TestCase):
 
@@ -236,6 +522,50 @@ class TestArrayColumnGeneration(unittest.TestCase):
             c.astype(str).isin(['[]', "['foo']", "['bar']", "['foo' 'bar']"]))
         assert c.astype(str).unique().size == 4
 
+    def test_array_column_is_a_list(self):
+        """Tests that an Array of columns with compatible types is an Arrow list, with drop_nulls shortening rows."""
+        conf = """
+        name: mytbl
+        rows: 4
+        columns:
+          - col: col1 Series Int
+            values: [1, 2]
+            null_percentage: 50
+          - col: col2 Sequential Float 0.5 1
+          - col: arr_col Array
+            drop_nulls: True
+            source_columns:
+              - col1
+              - col2
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        c = tbl.df["arr_col"]
+        assert pa.Table.from_pandas(tbl.df).schema.field("arr_col").type == pa.list_(pa.float64())
+        assert sorted(c.apply(lambda x: x.size)) == [1, 1, 2, 2]
+        assert all(c.apply(lambda x: x[-1]) == [0.5, 1.5, 2.5, 3.5])
+
+    def test_array_column_of_ints_with_nulls(self):
+        """Tests that rows of an Int Array with nulls keep their ints, with the nulls as NA."""
+        conf = """
+        name: mytbl
+        rows: 2
+        columns:
+          - col: col1 Sequential Int 1 1
+          - col: col2 Series Int
+            values: [5, 6]
+            null_percentage: 50
+          - col: arr_col Array
+            source_columns: [col1, col2]
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        rows = sorted(tbl.df["arr_col"], key=lambda row: pd.isna(row[1]))
+        assert list(rows[0]) == [1, 5] or list(rows[0]) == [2, 6]
+        assert rows[1][0] in (1, 2) and isinstance(rows[1][0], int) and rows[1][1] is pd.NA
+
     def test_basic_array_column_to_json(self):
         """"""
         conf = """
@@ -257,7 +587,7 @@ class TestArrayColumnGeneration(unittest.TestCase):
         #print(tbl.df)
         assert len(tbl.df.columns) == 1
         first_row = tbl.df['arr_col'][0]
-        assert first_row == '[4, 5, "foo"]'
+        assert first_row == '[4,5,"foo"]'
 
     def test_array_column_to_json_with_null(self):
         """"""
@@ -280,7 +610,7 @@ class TestArrayColumnGeneration(unittest.TestCase):
         #print(tbl.df)
         assert len(tbl.df.columns) == 1
         first_row = tbl.df['arr_col'][0]
-        assert first_row == '[null, 5, "foo"]'
+        assert first_row == '[null,5,"foo"]'
 
     def test_array_column_to_json_with_null_drop_nulls(self):
         """"""
@@ -304,7 +634,7 @@ class TestArrayColumnGeneration(unittest.TestCase):
         #print(tbl.df)
         assert len(tbl.df.columns) == 1
         first_row = tbl.df['arr_col'][0]
-        assert first_row == '[5, "foo"]'
+        assert first_row == '[5,"foo"]'
 
 
 class TestSequentialColumnGeneration(unittest.TestCase):
@@ -323,6 +653,54 @@ class TestSequentialColumnGeneration(unittest.TestCase):
         assert len(tbl.df.columns) == 1
         assert list(tbl.df['seq_col'].values) == [10, 13, 16, 19, 22]
 
+    def test_seq_column_is_exact_and_continues_across_chunks(self):
+        """Tests that Int sequences past 2**53 are exact and each chunk carries on from the previous one."""
+
+        conf = """
+        name: mytbl
+        rows: 10
+        chunk_size: 3
+        columns:
+          - col: seq_col Sequential Int 9007199254740993 2
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df['seq_col'].dtype == 'Int64'
+        assert list(tbl.df['seq_col']) == [9007199254740993 + 2 * i for i in range(10)]
+
+    def test_seq_column_too_large(self):
+        conf = """
+        name: mytbl
+        rows: 10
+        columns:
+          - col: seq_col Sequential Int 9223372036854775800 1
+        """
+        tbl = Table.parse_from_yaml(conf)
+
+        with pytest.raises(Exception, match="does not fit in a 64 bit int"):
+            tbl.generate()
+
+    def test_seq_column_fractional_int_params_are_not_truncated(self):
+        conf = """
+        name: mytbl
+        rows: 4
+        columns:
+          - name: seq_col
+            column_type: Sequential
+            data_type: Int
+            start: 0
+            step: 0.5
+        """
+        tbl = Table.parse_from_yaml(conf)
+
+        with pytest.raises(Exception, match="cannot safely cast non-equivalent float64 to int64"):
+            tbl.generate()
+
+        tbl = Table.parse_from_yaml(conf.replace("start: 0", "start: 2.0").replace("step: 0.5", "step: 2"))
+        tbl.generate()
+        assert list(tbl.df['seq_col']) == [2, 4, 6, 8]
+
     def test_basic_seq_column_timestamp(self):
         conf = """
         name: mytbl
@@ -360,7 +738,8 @@ class TestEmptyColumn(unittest.TestCase):
         #print(tbl.df)
         assert len(tbl.df.columns) == 1
         assert all(tbl.df["col1"].isnull())
-        assert tbl.df["col1"].dtype == "string"
+        assert tbl.df["col1"].dtype == "category"
+        assert tbl.df["col1"].cat.categories.dtype == "string"
 
     def test_basic_empty_int(self):
         conf = """
@@ -375,7 +754,94 @@ class TestEmptyColumn(unittest.TestCase):
         #print(tbl.df)
         assert len(tbl.df.columns) == 1
         assert all(tbl.df["col1"].isnull())
-        assert tbl.df["col1"].dtype == "Int64"
+        assert tbl.df["col1"].dtype == "category"
+        assert tbl.df["col1"].cat.categories.dtype == "Int64"
+
+
+class TestEvalColumn(unittest.TestCase):
+
+    def test_consecutive_evals_are_evaluated_together(self):
+        """Tests that consecutive Evals are grouped, can use each other and give the same result in every chunk."""
+
+        conf = """
+        name: mytbl
+        rows: 10
+        chunk_size: 4
+        columns:
+          - col: num Random Int 1 5
+          - name: doubled
+            column_type: Eval
+            expression: num * 2
+          - name: total
+            column_type: Eval
+            expression: doubled + rowId
+          - col: nulls Eval Int "total - 1"
+            null_percentage: 50
+          - col: after_nulls Eval Int "nulls + 1"
+        """
+        tbl = Table.parse_from_yaml(conf)
+
+        assert [type(step) for step in tbl.steps] == [column.Random, column.EvalGroup, column.Eval]
+        assert [c.name for c in tbl.steps[1].columns] == ["doubled", "total", "nulls"]
+
+        tbl.generate()
+
+        assert list(tbl.df["doubled"]) == list(tbl.df["num"] * 2)
+        assert list(tbl.df["total"]) == list(tbl.df["doubled"] + np.arange(10))
+        assert tbl.df["nulls"].isnull().sum() == 5
+        assert all(tbl.df["after_nulls"].isnull() == tbl.df["nulls"].isnull())
+
+    def test_unknown_engine(self):
+        conf = """
+        name: mytbl
+        rows: 10
+        columns:
+          - name: col1
+            column_type: Eval
+            expression: rowId + 1
+            engine: fast
+        """
+        with pytest.raises(Exception, match="engine: \\[fast\\] not recognised"):
+            Table.parse_from_yaml(conf)
+
+
+class TestTimestampOffsetColumn(unittest.TestCase):
+
+    def test_offsets_are_whole_time_units_and_keep_nulls(self):
+        conf = """
+        name: mytbl
+        rows: 100
+        columns:
+          - col: start_time Random Timestamp 2021-01-01 2021-12-31
+            null_percentage: 10
+          - col: end_time TimestampOffset Timestamp 4H 30D
+            source_column: start_time
+            time_unit: ms
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["end_time"].dtype == 'datetime64[ns]'
+        assert all(tbl.df["end_time"].isnull() == tbl.df["start_time"].isnull())
+
+        offsets = (tbl.df["end_time"] - tbl.df["start_time"]).dropna()
+        assert len(offsets) == 90
+        assert all((offsets >= pd.Timedelta("4H")) & (offsets <= pd.Timedelta("30D")))
+        assert all(offsets.dt.microseconds % 1000 == 0)
+
+    def test_source_column_must_be_a_timestamp(self):
+        conf = """
+        name: mytbl
+        rows: 10
+        columns:
+          - col: start_time Random Int 1 10
+          - col: end_time TimestampOffset Timestamp 4H 30D
+            source_column: start_time
+        """
+        tbl = Table.parse_from_yaml(conf)
+
+        with pytest.raises(Exception, match="should be a Timestamp column"):
+            tbl.generate()
 
 
 class TestNestedColumns(unittest.TestCase):
@@ -451,6 +917,44 @@ class TestExtractDateColumn(unittest.TestCase):
         assert all(
             tbl.df["event_time"].dt.strftime("%Y-%m-%d") == tbl.df["dt"])
 
+    def test_extract_date_as_string_with_time_and_nulls(self):
+        conf = """
+        name: mytbl
+        rows: 50
+        columns:
+          - col: event_time Random Timestamp 2021-01-01 2021-01-03
+            null_percentage: 20
+          - name: hour
+            column_type: ExtractDate
+            source_column: event_time
+            data_type: String
+            date_format: "%Y-%m-%d %H"
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert tbl.df["hour"].dtype == 'string'
+        assert tbl.df["hour"].isnull().sum() == 10
+        expected = tbl.df["event_time"].dt.strftime("%Y-%m-%d %H")
+        assert all(expected[tbl.df["event_time"].notnull()] == tbl.df["hour"].dropna())
+
+    def test_extract_date_as_string_with_flagged_directives(self):
+        conf = """
+        name: mytbl
+        rows: 4
+        columns:
+          - col: event_time Sequential Timestamp "2021-01-01 00:00:00" 5H
+          - name: hour
+            column_type: ExtractDate
+            source_column: event_time
+            data_type: String
+            date_format: "%d %-H"
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        assert list(tbl.df["hour"]) == ["01 0", "01 5", "01 10", "01 15"]
+
     def test_extract_date_as_date(self):
         conf = """
         name: mytbl
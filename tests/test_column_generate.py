@@ -11,6 +11,28 @@ from tests.utils import empty_df
 
 
 class TestColumnParsing:
+    def test_nested_subclass_parses(self):
+        from dataclasses import dataclass
+
+        @dataclass(kw_only=True)
+        class NestedRandom(column.Random):
+            pass
+
+        conf = """
+        col: mycol NestedRandom Int 1 5
+        """
+        col = ColumnFactory.parse_from_yaml(conf)
+        assert isinstance(col, NestedRandom)
+        assert col.min == "1"
+        assert ColumnFactory.registry()["NestedRandom"] is NestedRandom
+
+    def test_unknown_column_type(self):
+        conf = """
+        col: mycol Nonexistent Int
+        """
+        with pytest.raises(NotImplementedError, match="Could not find class named \\[Nonexistent\\]"):
+            ColumnFactory.parse_from_yaml(conf)
+
     # Fixed Column
     def test_fixed_column_parses(self):
         conf = """
@@ -106,9 +128,8 @@ class TestColumnParsing:
         col = ColumnFactory.parse_from_yaml(conf)
         assert isinstance(col, column.Selection)
         assert col.data_type == 'String'
-        assert col.values == [
-            "first", "first", "first", "first", "first", "second"
-        ]
+        assert col.values == ["first", "second"]
+        assert list(col.probabilities) == [5 / 6, 1 / 6]
 
     def test_short_selection_column_string_with_too_many_weights_parses(self):
         conf = """
@@ -125,7 +146,8 @@ class TestColumnParsing:
         col = ColumnFactory.parse_from_yaml(conf)
         assert isinstance(col, column.Selection)
         assert col.data_type == 'String'
-        assert col.values == ["first", "first", "second", "second"]
+        assert col.values == ["first", "second"]
+        assert list(col.probabilities) == [0.5, 0.5]
 
     # Map Column
     def test_short_map(self):
@@ -286,7 +308,8 @@ class TestFixedColumnGeneration(unittest.TestCase):
         series = col.generate(5)
         assert series.size == 5
         assert all(series == "b")
-        assert series.dtype == 'object'
+        assert series.dtype == 'category'
+        assert list(series.cat.categories) == ["b"]
 
     def test_fixed_column_int_string(self):
         conf = """
@@ -300,7 +323,7 @@ class TestFixedColumnGeneration(unittest.TestCase):
         series = col.generate(5)
         assert series.size == 5
         assert all(series == "4")
-        assert series.dtype == 'object'
+        assert series.dtype == 'category'
 
     def test_fixed_column_int(self):
         conf = """
@@ -314,7 +337,8 @@ class TestFixedColumnGeneration(unittest.TestCase):
         series = col.generate(5)
         assert series.size == 5
         assert all(series == 4)
-        assert pd.api.types.is_integer_dtype(series)
+        assert series.dtype == 'category'
+        assert pd.api.types.is_integer_dtype(series.cat.categories)
 
     def test_fixed_column_int_short(self):
         conf = """
@@ -325,7 +349,8 @@ class TestFixedColumnGeneration(unittest.TestCase):
 
         series = col.generate(5)
         assert all(series == 3)
-        assert series.dtype == 'Int64'
+        assert series.dtype == 'category'
+        assert series.cat.categories.dtype == 'Int64'
 
     def test_fixed_column_float_short(self):
         conf = """
@@ -336,7 +361,8 @@ class TestFixedColumnGeneration(unittest.TestCase):
 
         series = col.generate(5)
         assert all(series == 3.56)
-        assert series.dtype == 'float64'
+        assert series.dtype == 'category'
+        assert series.cat.categories.dtype == 'float64'
 
     def test_fixed_column_float_long(self):
         conf = """
@@ -349,7 +375,8 @@ class TestFixedColumnGeneration(unittest.TestCase):
 
         series = col.generate(5)
         assert all(series == 3.76)
-        assert series.dtype == 'float64'
+        assert series.dtype == 'category'
+        assert series.cat.categories.dtype == 'float64'
 
 
 class TestRandomColumnGeneration:
@@ -461,6 +488,22 @@ class TestRandomColumnGeneration:
         assert series.dtype == 'string'
         assert all(lens == 5000)
 
+    def test_random_string_split_into_arrow_chunks(self, monkeypatch):
+        # force the strings to be split across several arrow arrays
+        monkeypatch.setattr(column, "MAX_STRING_ARRAY_BYTES", 40)
+        conf = """
+        col: mycol Random String 3 10
+        """
+        col = ColumnFactory.parse_from_yaml(conf)
+
+        series = col.generate(25)
+
+        lens = series.str.len()
+        assert series.size == 25
+        assert all((lens >= 3) & (lens <= 10))
+        assert all(series.str.fullmatch(r"[a-zA-Z]+"))
+        assert series.array._data.num_chunks == 7
+
     @pytest.mark.parametrize("data_type", ["Timestamp", "Datetime"])
     def test_random_timestamp_default_ms(self, data_type):
         conf = f"""
@@ -520,6 +563,30 @@ class TestRandomColumnGeneration:
         assert all(series.dt.microsecond == 0)
 
 
+    def test_random_timestamp_nanosecond_prec(self):
+        conf = """
+        col: mycol Random Timestamp '2021-01-01 08:00:00' "2021-01-01 08:00:00.000001"
+        time_unit: ns
+        """
+        col = ColumnFactory.parse_from_yaml(conf)
+
+        series = col.generate(1000)
+        assert series.dtype == 'datetime64[ns]'
+        # the range is 1000ns so every nanosecond should be drawn without any lost to float rounding
+        assert set(series.dt.nanosecond) <= set(range(1000))
+        assert series.dt.nanosecond.nunique() > 500
+
+    def test_random_timestamp_as_int(self):
+        conf = """
+        col: mycol Random TimestampAsInt '2021-01-01' "2021-01-02"
+        time_unit: s
+        """
+        col = ColumnFactory.parse_from_yaml(conf)
+
+        series = col.generate(10)
+        assert series.dtype == 'int64'
+        assert all((series >= 1609459200) & (series < 1609545600))
+
 class TestSelectionColumnGeneration(unittest.TestCase):
 
     def test_selection_column_values(self):
@@ -560,6 +627,40 @@ class TestSelectionColumnGeneration(unittest.TestCase):
         assert any(series == 6)
 
 
+    def test_selection_column_large_weights(self):
+        conf = """
+        col: mycol Selection String
+        values:
+          - common
+          - rare
+        weights:
+          - 990000
+          - 10000
+        """
+        col = ColumnFactory.parse_from_yaml(conf)
+        assert col.values == ["common", "rare"]
+
+        series = col.generate(10000)
+        assert series.size == 10000
+        assert all(series.isin(["common", "rare"]))
+        # roughly 1% should be rare
+        assert 30 < (series == "rare").sum() < 200
+
+    def test_selection_column_invalid_weights(self):
+        conf = """
+        col: mycol Selection String
+        values:
+          - first
+          - second
+        weights:
+          - -1
+        """
+        with pytest.raises(Exception) as e:
+            ColumnFactory.parse_from_yaml(conf)
+
+        assert "weights" in e.__repr__()
+
+
 class TestSeriesColumnGeneration(unittest.TestCase):
 
     def test_series_column_values(self):
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from faux_data.datetimes import format_resolution, format_timestamps, parse_fixed_width_format
+
+
+class TestFormatResolution:
+
+    # yapf: disable
+    test_values = [
+        ("%Y-%m-%d", "D"),
+        ("%Y%m", "D"),
+        ("%Y-%m-%d %H", "H"),
+        ("%H:%M", "T"),
+        ("%Y-%m-%d %H:%M:%S", "S"),
+        ("%Y-%m-%dT%H:%M:%S.%f", None),
+        ("%s", None),
+        ("%Y 100%%", "D"),
+        ("%d %-H", "H"),
+        ("%_d/%-m %-I%p", "H"),
+        ("%Ey %OM", "T"),
+        ("%d %Q", None),
+    ]
+    # yapf: enable
+
+    @pytest.mark.parametrize("date_format,expected", test_values)
+    def test_format_resolution(self, date_format, expected):
+        assert format_resolution(date_format) == expected
+
+
+class TestFormatTimestamps:
+
+    timestamps = pd.Series(pd.to_datetime([
+        "2022-01-31 23:59:59.123456", None, "1969-12-31 00:00:01", "2000-02-29 12:30:00", "1700-03-01"
+    ]))
+
+    @pytest.mark.parametrize("date_format", [
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%dT%H:%M:%S.%f",
+        "%Y%m%d",
+        "%d/%m/%Y %H:%M",
+        "%s",
+        "100%% %Y",
+        "%b %Y",  # not fixed width so formatted with strftime
+    ])
+    def test_format_timestamps_matches_strftime(self, date_format):
+        formatted = format_timestamps(self.timestamps, date_format)
+
+        assert formatted.dtype == "string"
+        assert list(formatted.astype(object).fillna("null")) == \
+            list(self.timestamps.dt.strftime(date_format).fillna("null"))
+
+    def test_parse_fixed_width_format(self):
+        assert parse_fixed_width_format("%Y-%m-%d") == ["Y", b"-", "m", b"-", "d"]
+        assert parse_fixed_width_format("%A") is None
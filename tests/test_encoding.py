@@ -0,0 +1,65 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from faux_data import encoding
+from faux_data.table import Table
+
+
+def sample_df():
+    return pd.DataFrame({
+        "int": pd.Series([1, None], dtype="Int64"),
+        "float": [1.5, np.nan],
+        "ts": pd.to_datetime(["2022-01-01 10:00:01.5", None]),
+        "cat": pd.Categorical(["a", None]),
+    })
+
+
+class TestJsonLines(unittest.TestCase):
+
+    def test_nulls_and_timestamps(self):
+        rows = encoding.to_json_lines(sample_df())
+
+        assert rows == [
+            b'{"int":1,"float":1.5,"ts":"2022-01-01T10:00:01.500","cat":"a"}',
+            b'{"int":null,"float":null,"ts":null,"cat":null}',
+        ]
+
+    def test_epoch_timestamps(self):
+        rows = encoding.to_json_lines(sample_df()[["ts"]], date_format="epoch", time_unit="s")
+
+        assert rows == [b'{"ts":1641031201}', b'{"ts":null}']
+
+    def test_decimals_and_nested_maps(self):
+        conf = """
+        name: mytbl
+        rows: 1
+        columns:
+          - col: price Fixed Decimal 2.5
+            decimal_places: 2
+          - col: map_col Map
+            columns:
+              - col: when Fixed Timestamp 2022-01-01
+              - col: amount Fixed Decimal 1.25
+        """
+        tbl = Table.parse_from_yaml(conf)
+        tbl.generate()
+
+        rows = encoding.to_json_lines(tbl.df)
+
+        assert rows == [b'{"price":2.5,"map_col":{"when":"2022-01-01T00:00:00.000","amount":1.25}}']
+
+    def test_json_arrays_drop_nulls(self):
+        rows = encoding.to_json_arrays(sample_df(), drop_nulls=True)
+
+        assert rows == [b'[1,1.5,"2022-01-01T10:00:01.500","a"]', b'[]']
+
+    def test_standard_library_fallback_matches(self):
+        expected = encoding.to_json_lines(sample_df())
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(encoding, "orjson", None)
+            assert encoding.to_json_lines(sample_df()) == expected
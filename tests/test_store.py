@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from faux_data.store import ColumnStore
+
+
+class TestColumnStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ColumnStore.from_frame(pd.DataFrame({"rowId": np.arange(4)}))
+
+    def test_values_are_held_as_series_on_the_index(self):
+        self.store["fixed"] = 3
+        self.store["arr"] = np.array([1.5, 2.5, 3.5, 4.5])
+        self.store["shifted"] = pd.Series([10, 11], index=[2, 3])
+
+        assert self.store.columns == ["rowId", "fixed", "arr", "shifted"]
+        assert list(self.store["fixed"]) == [3, 3, 3, 3]
+        assert self.store["arr"].name == "arr"
+        assert self.store["shifted"].isna().tolist() == [True, True, False, False]
+
+        del self.store["fixed"]
+        assert "fixed" not in self.store
+        assert len(self.store) == 4
+
+    def test_frame_shares_the_column_data(self):
+        values = np.arange(4.0)
+        self.store["a"] = values
+
+        df = self.store.frame(["a", "rowId"])
+
+        assert list(df.columns) == ["a", "rowId"]
+        assert np.shares_memory(df["a"].to_numpy(), values)
+
+    def test_eval_only_adds_the_columns_assigned(self):
+        self.store["a"] = [1, 2, 3, 4]
+        a = self.store["a"]
+
+        self.store.eval("b = a + rowId\nc = b * 2", inplace=True)
+
+        assert self.store.columns == ["rowId", "a", "b", "c"]
+        assert self.store["a"] is a
+        assert list(self.store["c"]) == [2, 6, 10, 14]
+        assert list(self.store.eval("a - 1")) == [0, 1, 2, 3]
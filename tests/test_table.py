@@ -1,5 +1,9 @@
+import os
+import tracemalloc
 import unittest
+from unittest.mock import patch
 
+import pandas as pd
 import pytest
 from faux_data.table import Table, TableParsingException
 
@@ -86,3 +90,249 @@ class TestTableGeneration(unittest.TestCase):
 
         assert len(tbl.df.columns) == 1
         assert tbl.df.columns == ["col2"]
+
+    def test_output_columns_only_generates_the_columns_they_use(self):
+        conf = """
+        name: mytable
+        rows: 20
+        seed: 3
+        columns:
+        - col: unused Random Int 1 10
+        - col: a Random Int 1 10
+        - col: b Random Int 1 10
+        - col: c Eval Int "a + rowId"
+        - col: d Array
+          source_columns: [b]
+        - col: out Map
+          columns:
+          - col: x Eval Int "c * 2"
+          - col: y Selection String
+            values: [p, q]
+        - col: also_unused Eval Int "c + 1"
+        """
+        full = Table.parse_from_yaml(conf)
+        full.generate()
+
+        tbl = Table.parse_from_yaml(conf.replace("seed: 3", "seed: 3\n        output_columns: [out, d]"))
+        tbl.generate()
+
+        assert [step.name for step in tbl.steps] == ["a", "b", "c", "d", "out"]
+        pd.testing.assert_frame_equal(tbl.df, full.df[["out", "d"]])
+
+    def test_columns_are_released_after_their_last_read(self):
+        conf = """
+        name: mytable
+        rows: 10
+        output_columns: [total, a, arr]
+        columns:
+        - col: a Random Int 1 10
+        - col: scratch1 Random Int 1 10
+        - col: scratch2 Eval Int "scratch1 * 2"
+        - col: a Eval Int "a + scratch1"
+        - col: arr Array
+          source_columns: [scratch2]
+        - col: total Eval Int "a + 1"
+        """
+        tbl = Table.parse_from_yaml(conf)
+        assert tbl.releases == [[], [], ["scratch1"], [], []]
+
+        tbl.generate()
+        assert list(tbl.df.columns) == ["total", "a", "arr"]
+        assert (tbl.df["total"] == tbl.df["a"] + 1).all()
+
+    def test_released_columns_are_freed_when_generated_in_threads(self):
+        rows = 10_000
+        columns = [{"col": "s0 Random Int 1 100"}, {"col": 'acc0 Eval Int "s0 + 0"'}]
+        for i in range(1, 25):
+            columns.append({"col": f"s{i} Random Int 1 100"})
+            columns.append({"col": f'acc{i} Eval Int "acc{i - 1} + s{i}"'})
+
+        peaks = {}
+        for threads in [True, False]:
+            tbl = Table(name="mytable", rows=rows, columns=columns, output_columns=["acc24"], seed=1)
+            tracemalloc.start()
+            tbl.generate_batch(tbl.create_df(), 0, threads=threads)
+            peaks[threads] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        # only as many columns as there are threads are generated ahead of the column being added
+        column_bytes = rows * 8
+        assert peaks[True] - peaks[False] < ((os.cpu_count() or 1) + 4) * column_bytes
+
+    def test_output_columns_must_exist(self):
+        conf = """
+        name: mytable
+        rows: 5
+        output_columns: [col1, col2]
+        columns:
+        - col: col1 Random Int 1 10
+        """
+        with pytest.raises(TableParsingException, match=r"output_columns: \['col2'\] are not columns"):
+            Table.parse_from_yaml(conf)
+
+
+class TestChunkedTableGeneration(unittest.TestCase):
+
+    conf = """
+        name: mytable
+        rows: 23
+        columns:
+        - col: id Sequential Int 5 2
+        - col: ts Sequential Timestamp 2021-01-01 1H30min
+        - col: month_end Sequential Timestamp 2021-01-15 M
+        - col: letters Series
+          values: [a, b, c]
+        """
+
+    def test_iter_batches_yields_chunks_of_chunk_size(self):
+        tbl = Table.parse_from_yaml(self.conf + "chunk_size: 5\n")
+
+        batches = list(tbl.iter_batches())
+
+        assert [len(batch) for batch in batches] == [5, 5, 5, 5, 3]
+        assert list(batches[1].columns) == ["id", "ts", "month_end", "letters"]
+
+    def test_chunked_generation_matches_single_pass(self):
+        single = Table.parse_from_yaml(self.conf)
+        single.generate()
+
+        chunked = Table.parse_from_yaml(self.conf + "chunk_size: 4\n")
+        chunked.generate()
+
+        assert len(chunked.df) == 23
+        pd.testing.assert_frame_equal(single.df, chunked.df)
+
+    def test_invalid_chunk_size(self):
+        with pytest.raises(TableParsingException) as e:
+            Table.parse_from_yaml(self.conf + "chunk_size: -1\n")
+
+        assert "chunk_size" in e.__repr__()
+
+
+class TestParallelTableGeneration(unittest.TestCase):
+
+    conf = """
+        name: mytable
+        rows: 40
+        columns:
+        - col: id Sequential Int 1 1
+        - col: num Random Int 0 1000000000
+        """
+
+    def test_parallel_generation_keeps_rows_in_order(self):
+        tbl = Table.parse_from_yaml(self.conf)
+        tbl.generate(workers=2)
+
+        assert len(tbl.df) == 40
+        assert list(tbl.df["id"]) == list(range(1, 41))
+
+    def test_parallel_generation_matches_serial_generation_with_seed(self):
+        conf = self.conf + "chunk_size: 10\n        seed: 42\n"
+
+        serial = Table.parse_from_yaml(conf)
+        serial.generate()
+
+        parallel = Table.parse_from_yaml(conf)
+        parallel.generate(workers=2)
+
+        pd.testing.assert_frame_equal(serial.df, parallel.df)
+
+    def test_parallel_generation_without_chunk_size_matches_serial_generation_with_seed(self):
+        conf = self.conf + "seed: 42\n"
+
+        serial = Table.parse_from_yaml(conf)
+        serial.generate()
+
+        parallel = Table.parse_from_yaml(conf)
+        parallel.generate(workers=2)
+
+        pd.testing.assert_frame_equal(serial.df, parallel.df)
+
+        # and when the table is bigger than a single default chunk
+        with patch("faux_data.table.DEFAULT_CHUNK_SIZE", 15):
+            chunked = Table.parse_from_yaml(conf)
+            chunked.generate()
+
+            chunked_parallel = Table.parse_from_yaml(conf)
+            chunked_parallel.generate(workers=2)
+
+        pd.testing.assert_frame_equal(chunked.df, chunked_parallel.df)
+
+    def test_chunks_without_chunk_size_dont_depend_on_workers(self):
+        with patch("faux_data.table.DEFAULT_CHUNK_SIZE", 15):
+            serial = list(Table.parse_from_yaml(self.conf).iter_batches())
+            parallel = list(Table.parse_from_yaml(self.conf).iter_batches(workers=3))
+
+        assert [len(batch) for batch in serial] == [15, 15, 10]
+        assert [len(batch) for batch in parallel] == [15, 15, 10]
+
+    def test_parallel_chunks_have_independent_random_values(self):
+        tbl = Table.parse_from_yaml(self.conf + "chunk_size: 10\n")
+        batches = list(tbl.iter_batches(workers=2))
+
+        assert len(batches) == 4
+        # each chunk gets its own random stream so no two chunks should match
+        assert len({tuple(batch["num"]) for batch in batches}) == 4
+
+
+class TestColumnDependencies(unittest.TestCase):
+
+    def test_dependencies_follow_the_latest_definition(self):
+        conf = """
+        name: mytable
+        rows: 5
+        columns:
+        - col: a Random Int 1 10
+        - col: b Eval Int "a + rowId"
+        - col: a Eval Int "b * 2"
+        - col: c Eval Int "a + b"
+        - col: arr Array
+          source_columns: [a, c]
+        """
+        tbl = Table.parse_from_yaml(conf)
+
+        assert tbl.dependencies == [set(), {-1, 0}, {1}, {1, 2}, {2, 3}]
+
+    def test_invalid_references_are_reported_before_generating(self):
+        conf = """
+        name: mytable
+        rows: 5
+        columns:
+        - col: a Eval Int "b + 1"
+        - col: b Eval Int "a + 1"
+        - col: c Eval Int "d + 1"
+        - col: e Random Int 1 10
+        - col: arr Array
+          source_columns: [e]
+        - col: f Eval Int "missing + e"
+        """
+        with pytest.raises(TableParsingException) as e:
+            Table.parse_from_yaml(conf)
+
+        message = str(e.value)
+        assert "Columns form a cycle [a] -> [b] -> [a]" in message
+        assert "Column [c] uses [d] which does not exist" in message
+        assert "Column [f] uses [missing] which does not exist" in message
+        assert "Column [f] uses [e] which was dropped by column [arr]" in message
+
+    def test_independent_columns_generated_in_threads_match(self):
+        conf = """
+        name: mytable
+        rows: 50
+        seed: 7
+        columns:
+        - col: a Random Int 1 10
+        - col: b Random Float 1 10
+          null_percentage: 10
+        - col: c Selection String
+          values: [x, y]
+        - col: d Eval Float "a * b"
+        - col: e Fixed Int 3
+        """
+        threaded = Table.parse_from_yaml(conf)
+        df = threaded.generate_batch(threaded.create_df(), 0, threads=True)
+
+        single = Table.parse_from_yaml(conf)
+        expected = single.generate_batch(single.create_df(), 0, threads=False)
+
+        pd.testing.assert_frame_equal(df, expected)
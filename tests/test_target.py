@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+from decimal import Decimal
 from unittest.mock import MagicMock, ANY
 
 import pandas as pd
@@ -39,6 +41,141 @@ class TestLocalFileTargetParsing(unittest.TestCase):
         assert targ.filetype == "csv"
 
 
+    def test_file_target_appends_batches(self):
+        tbl_conf = """
+        name: mytable
+        rows: 25
+        chunk_size: 10
+        columns:
+        - col: id Sequential Int 1 1
+        - col: part Series
+          values: [a, b]
+        """
+        tbl = Table.parse_from_yaml(tbl_conf)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_targ = TargetFactory.parse({"target": "LocalFile", "filetype": "csv",
+                                            "filepath": tmpdir, "filename": "file.csv"})
+            parquet_targ = TargetFactory.parse({"target": "LocalFile", "filetype": "parquet",
+                                                "filepath": f"{tmpdir}/parts", "filename": "file.parquet",
+                                                "partition_cols": ["part"]})
+            tbl.targets = [csv_targ, parquet_targ]
+            tbl.run()
+
+            csv_df = pd.read_csv(f"{tmpdir}/file.csv")
+            assert list(csv_df["id"]) == list(range(1, 26))
+
+            part_a = pd.read_parquet(f"{tmpdir}/parts/part=a/file.parquet")
+            assert list(part_a["id"]) == list(range(1, 26, 2))
+
+
+    def test_file_target_parquet_first_batch_all_null(self):
+        tbl_conf = """
+        name: mytable
+        rows: 6
+        chunk_size: 3
+        columns:
+        - col: ts Series Timestamp
+          values: [null, null, null, 2021-01-01, 2021-01-02, null]
+        - name: dt
+          column_type: ExtractDate
+          data_type: Date
+          source_column: ts
+        """
+        tbl = Table.parse_from_yaml(tbl_conf)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tbl.targets = [TargetFactory.parse({"target": "LocalFile", "filetype": "parquet",
+                                                "filepath": tmpdir, "filename": "file.parquet"})]
+            tbl.run()
+
+            df = pd.read_parquet(f"{tmpdir}/file.parquet")
+            assert df["dt"].isnull().tolist() == [True, True, True, False, False, True]
+            assert str(df["dt"][3]) == "2021-01-01"
+
+
+    def test_file_target_closed_when_a_batch_fails(self):
+        tbl_conf = """
+        name: mytable
+        rows: 6
+        chunk_size: 3
+        columns:
+        - col: id Sequential Int 1 1
+        """
+        tbl = Table.parse_from_yaml(tbl_conf)
+        failing_targ = MagicMock()
+        failing_targ.save_batch.side_effect = [None, Exception("load failed")]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parquet_targ = TargetFactory.parse({"target": "LocalFile", "filetype": "parquet",
+                                                "filepath": tmpdir, "filename": "file.parquet"})
+            tbl.targets = [parquet_targ, failing_targ]
+
+            with self.assertRaises(Exception):
+                tbl.run()
+
+            assert parquet_targ.writers == {}
+            failing_targ.abort_batches.assert_called_once()
+            failing_targ.close_batches.assert_not_called()
+            assert list(pd.read_parquet(f"{tmpdir}/file.parquet")["id"]) == [1, 2, 3, 4, 5, 6]
+
+
+    def test_file_target_parquet_map_columns_read_back(self):
+        tbl_conf = """
+        name: mytable
+        rows: 6
+        columns:
+        - col: id Sequential Int 1 1
+        - col: amount Random Decimal 1 100 2
+        - col: event Map
+          source_columns: [id, amount]
+        """
+        for chunk_size in [None, 4]:
+            tbl = Table.parse_from_yaml(tbl_conf)
+            tbl.chunk_size = chunk_size
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tbl.targets = [TargetFactory.parse({"target": "LocalFile", "filetype": "parquet",
+                                                    "filepath": tmpdir, "filename": "file.parquet"})]
+                tbl.run()
+
+                df = pd.read_parquet(f"{tmpdir}/file.parquet")
+
+            assert [event["id"] for event in df["event"]] == list(range(1, 7))
+            assert all(isinstance(event["amount"], Decimal) for event in df["event"])
+
+
+    def test_file_target_parquet_array_columns_read_back(self):
+        tbl_conf = """
+        name: mytable
+        rows: 6
+        columns:
+        - col: int1 Sequential Int 1 1
+        - col: int2 Sequential Int 10 1
+        - col: str1 Random String 1 3
+        - col: str2 Random String 1 3
+          null_percentage: 50
+        - col: ints Array
+          source_columns: [int1, int2]
+        - col: strs Array
+          drop_nulls: True
+          source_columns: [str1, str2]
+        """
+        for chunk_size in [None, 4]:
+            tbl = Table.parse_from_yaml(tbl_conf)
+            tbl.chunk_size = chunk_size
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tbl.targets = [TargetFactory.parse({"target": "LocalFile", "filetype": "parquet",
+                                                    "filepath": tmpdir, "filename": "file.parquet"})]
+                tbl.run()
+
+                df = pd.read_parquet(f"{tmpdir}/file.parquet")
+
+            assert [list(ints) for ints in df["ints"]] == [[i, i + 9] for i in range(1, 7)]
+            assert all(1 <= len(strs) <= 2 for strs in df["strs"])
+
+
 class TestCloudStorageTarget(unittest.TestCase):
 
     def test_target_cloud_storage_target_parses(self):
@@ -254,3 +391,46 @@ class TestBigQueryTarget(unittest.TestCase):
         job_config = mock_client.load_table_from_dataframe.call_args.kwargs[
             "job_config"]
         assert job_config.schema == expected_schema
+
+    def test_target_bigquery_schema_for_dictionary_encoded_types(self):
+        """A table with a BQ Target should specify a schema for dictionary encoded (Categorical) columns."""
+
+        tbl_conf = """
+        name: mytable
+        rows: 10
+        columns:
+        - col: int_col Random Int 3 10
+        - col: sel_col Selection String
+          values: [a, b, c]
+        - col: fixed_col Fixed Int 4
+        - col: empty_col Empty String
+        - col: fixed_time Fixed Timestamp 2022-01-01
+        """
+
+        tbl = Table.parse_from_yaml(tbl_conf)
+
+        tbl.generate()
+
+        conf = """
+        target: BigQuery
+        dataset: mydataset
+        table: my_table
+        """
+        targ = TargetFactory.parse_from_yaml(conf)
+        mock_client = MagicMock()
+        mock_client.get_dataset.return_value = "datasetfound"
+
+        targ.client = mock_client
+
+        targ.save(tbl)
+
+        expected_schema = [
+            bigquery.SchemaField("fixed_time", "TIMESTAMP"),
+            bigquery.SchemaField("sel_col", "STRING"),
+            bigquery.SchemaField("fixed_col", "INT64"),
+            bigquery.SchemaField("empty_col", "STRING"),
+        ]
+
+        job_config = mock_client.load_table_from_dataframe.call_args.kwargs[
+            "job_config"]
+        assert job_config.schema == expected_schema
@@ -1,5 +1,6 @@
 import unittest
 
+import pandas as pd
 import pytest
 from faux_data.table import TableParsingException
 from faux_data.template import Template
@@ -78,3 +79,45 @@ class TestTemplateFromString(unittest.TestCase):
         assert "payload" in e.__repr__()
         assert "user" in e.__repr__()
         assert "id" in e.__repr__()
+
+
+class TestTemplateSeed(unittest.TestCase):
+
+    template_str = strip_lborder("""
+    seed: {seed}
+    tables:
+      - name: mytable
+        rows: 50
+        columns:
+          - col: num Random Int 0 1000000
+          - col: flt Random Float 0 100
+            null_percentage: 20
+          - col: letter Selection String
+            values: [a, b, c]
+          - col: str Random String 2 8
+          - col: ts Random Timestamp 2022-01-01 2022-02-01
+          - col: end_ts TimestampOffset Timestamp 1H 2D
+            source_column: ts
+      - name: myothertable
+        rows: 50
+        columns:
+          - col: num Random Int 0 1000000
+    """)
+
+    def generate(self, seed):
+        t = Template.from_string(self.template_str.format(seed=seed))
+        t.generate()
+        return t
+
+    def test_same_seed_generates_identical_data(self):
+        first, second = self.generate(5), self.generate(5)
+
+        for first_table, second_table in zip(first.tables, second.tables):
+            pd.testing.assert_frame_equal(first_table.df, second_table.df)
+
+    def test_different_seeds_and_tables_generate_different_data(self):
+        first, second = self.generate(5), self.generate(6)
+
+        assert not first.tables[0].df.equals(second.tables[0].df)
+        # tables within a template get independent streams
+        assert not first.tables[0].df["num"].equals(first.tables[1].df["num"])
@@ -1,8 +1,13 @@
+import os
+import tempfile
 from datetime import datetime
+from decimal import Decimal
 import unittest
 
 import freezegun
+import pandas as pd
 import pytest
+from faux_data.arrays import to_decimal
 from faux_data.utils import *
 from faux_data.template_rendering import resolve_time_period
 
@@ -78,6 +83,48 @@ class TestUtilsExtractPrecisionAndScale(unittest.TestCase):
         assert type_ in repr(e)
 
 
+class TestUtilsLoadCsvWithTypes(unittest.TestCase):
+
+    def test_load_csv_decimal_precision_and_scale(self):
+        df = load_csv_with_types(os.path.join(os.path.dirname(__file__), "..", "templates", "test.csv"))
+
+        assert str(df["d"].dtype) == "decimal128(14, 2)"
+        assert list(df["d"]) == [Decimal("4.35"), Decimal("5.60")]
+
+    def test_load_csv_decimals_are_parsed_exactly(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "big.csv")
+            with open(path, "w") as f:
+                f.write("a,\"d[Decimal(38,4)]\"\n1,12345678901234567890.12345\n2,\n3,-0.00005\n")
+
+            df = load_csv_with_types(path)
+
+        assert list(df["d"][[0, 2]]) == [Decimal("12345678901234567890.1234"), Decimal("-0.0000")]
+        assert pd.isna(df["d"][1])
+
+
+class TestToDecimal(unittest.TestCase):
+
+    def test_large_floats_are_exact(self):
+        decimals = to_decimal(pd.Series([12345678901234.5, 1.25e20, None, 0.125]), 4)
+
+        assert list(decimals[[0, 1, 3]]) == [Decimal("12345678901234.5000"), Decimal("125000000000000000000.0000"),
+                                             Decimal("0.1250")]
+        assert pd.isna(decimals[2])
+
+    def test_large_ints_are_exact(self):
+        decimals = to_decimal(pd.Series([2 ** 62, -5]), 4)
+
+        assert list(decimals) == [Decimal(2 ** 62), Decimal(-5)]
+
+    def test_too_many_digits(self):
+        with pytest.raises(Exception, match="more than the \\[6\\] digits"):
+            to_decimal(pd.Series([12345.5]), 2, 6)
+
+        with pytest.raises(Exception, match="more than the \\[20\\] digits"):
+            to_decimal(pd.Series([1e20]), 2, 20)
+
+
 class TestResolveTimePeriod:
 
     # yapf: disable